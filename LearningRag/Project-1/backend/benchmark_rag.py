@@ -0,0 +1,200 @@
+"""
+Retrieval quality and latency benchmark for the resume RAG pipeline.
+
+    python benchmark_rag.py benchmarks/questions.jsonl
+    python benchmark_rag.py benchmarks/questions.jsonl --llm
+    python benchmark_rag.py benchmarks/questions.jsonl --save-baseline
+
+Runs against the saved vector store. benchmarks/questions.jsonl is
+labelled against the bundled resume.pdf (upload it first); each line is a
+labelled query, and a chunk is relevant to a label when the label appears
+in its text (case-insensitive):
+
+    {"question": "Where does the candidate study?", "relevant": ["Goa College of Engineering"]}
+
+Reports recall@k and MRR over the first-stage search candidates, recall
+over the context retrieve_context returns (MMR-reranked and budget
+packed), and p50/p95/p99 latency for each retrieve_context stage (query
+embedding, candidate search, MMR rerank, packing), the whole call and
+(with --llm) generation.
+
+Every run is appended to --history; against a saved baseline the script
+exits non-zero when quality drops or p95 latency grows past the limits.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from rag import (
+    FETCH_K,
+    _messages_for,
+    get_embeddings,
+    get_llm,
+    load_vector_store,
+    retrieve_context
+)
+from llm_client import pool
+from vector_index import search
+
+
+def label_recall(labels, docs):
+    texts = [d.page_content.lower() for d in docs]
+    found = sum(any(label.lower() in t for t in texts) for label in labels)
+    return found / len(labels)
+
+
+def reciprocal_rank(labels, docs):
+    for rank, doc in enumerate(docs, start=1):
+        if any(label.lower() in doc.page_content.lower() for label in labels):
+            return 1.0 / rank
+    return 0.0
+
+
+def percentiles(samples):
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2)}
+
+
+def timed(timings, stage, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def load_questions(path):
+    with open(path, "r", encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+    return [q for q in questions if q.get("relevant")]
+
+
+def run(questions, vector_store, ks, k_context=3, with_llm=False):
+    index = vector_store.index
+    fetch_k = max(max(ks), FETCH_K)
+    llm = get_llm() if with_llm else None
+
+    timings = {}
+    recalls = {k: [] for k in ks}
+    ranks, context_recalls = [], []
+
+    for q in questions:
+        question, labels = q["question"], q["relevant"]
+
+        # Candidate ranking for recall@k / MRR: the first-stage search alone
+        # (untimed; the pipeline's own stages are timed below)
+        query_vector = np.asarray(vector_store.embedding_function.embed_query(question), dtype="float32")
+        ids = search(index, query_vector[None, :], fetch_k)[0]
+        candidates = [
+            vector_store.docstore.search(vector_store.index_to_docstore_id[int(i)])
+            for i in ids[ids >= 0]
+        ]
+
+        # The context the API would send: the pipeline's own retrieval, with
+        # each of its stages timed as well as the whole call
+        def stage(name, fn, *args):
+            return timed(timings, name, fn, *args)
+
+        context = timed(
+            timings, "retrieve", retrieve_context, question, vector_store,
+            k=k_context, stage=stage
+        )
+
+        if llm is not None and context:
+            messages = _messages_for(question, context)
+            with pool.slot():
+                timed(timings, "llm", llm.invoke, messages)
+
+        for k in ks:
+            recalls[k].append(label_recall(labels, candidates[:k]))
+        ranks.append(reciprocal_rank(labels, candidates))
+        context_recalls.append(label_recall(labels, context))
+
+    return {
+        "questions": len(questions),
+        "quality": {
+            **{f"recall@{k}": round(float(np.mean(recalls[k])), 4) for k in ks},
+            "mrr": round(float(np.mean(ranks)), 4),
+            "context_recall": round(float(np.mean(context_recalls)), 4)
+        },
+        "latency_ms": {stage: percentiles(samples) for stage, samples in timings.items()}
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(result, baseline, max_quality_drop, max_latency_increase):
+    problems = []
+    for metric, before in baseline["quality"].items():
+        after = result["quality"].get(metric)
+        if after is not None and before - after > max_quality_drop:
+            problems.append(f"{metric}: {before:.4f} -> {after:.4f}")
+    for stage, before in baseline["latency_ms"].items():
+        after = result["latency_ms"].get(stage)
+        if after is not None and after["p95"] > before["p95"] * (1 + max_latency_increase):
+            problems.append(f"{stage} p95: {before['p95']:.2f} ms -> {after['p95']:.2f} ms")
+    return problems
+
+
+def report(result):
+    print(f"{result['questions']} questions")
+    for metric, value in result["quality"].items():
+        print(f"  {metric:<16}{value:>8.4f}")
+
+    print(f"  {'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, p in result["latency_ms"].items():
+        print(f"  {stage:<16}{p['p50']:>10.2f}{p['p95']:>10.2f}{p['p99']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("questions", help="labelled question set (JSONL)")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--llm", action="store_true", help="also time answer generation")
+    parser.add_argument("--history", default="benchmarks/history.jsonl")
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--max-quality-drop", type=float, default=0.02)
+    parser.add_argument("--max-latency-increase", type=float, default=0.25)
+    args = parser.parse_args()
+
+    vector_store = load_vector_store(get_embeddings())
+    result = run(load_questions(args.questions), vector_store, args.k, with_llm=args.llm)
+    result.update({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "question_set": args.questions,
+        "index_type": type(vector_store.index).__name__
+    })
+    report(result)
+
+    os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = regressions(result, json.load(f), args.max_quality_drop, args.max_latency_increase)
+        if problems:
+            print("Regressions against baseline:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print("No regressions against baseline")
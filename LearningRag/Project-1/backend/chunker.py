@@ -0,0 +1,43 @@
+import os
+
+import shared_path  # noqa: F401  (makes `shared` importable)
+from shared.chunker import StructuredChunker as _StructuredChunker, TokenCounter, overlap_length  # noqa: F401
+
+
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "30"))
+# Chunks are sized in the embedding model's tokens (see shared/chunker.py)
+TOKENIZER_MODEL = os.getenv("TOKENIZER_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+token_counter = TokenCounter(TOKENIZER_MODEL)
+count_tokens = token_counter.count
+truncate_to_tokens = token_counter.truncate
+
+
+class StructuredChunker(_StructuredChunker):
+    # The shared chunker with this backend's tokenizer and sizes
+    def __init__(self, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        super().__init__(token_counter, max_tokens, overlap_tokens)
+
+
+# ----------------------------
+# Overlap spans
+# ----------------------------
+
+def strip_overlaps(docs) -> list[str]:
+    """
+    Context texts for the prompt with overlapping text sent once: when a
+    chunk's predecessor (same page, chunk_id - 1) is also in the context,
+    its recorded leading overlap is dropped.
+    """
+    present = {(d.metadata.get("page"), d.metadata.get("chunk_id", -1)) for d in docs}
+
+    texts = []
+    for d in docs:
+        text = d.page_content
+        overlap = d.metadata.get("overlap", 0)
+        if overlap and (d.metadata.get("page"), d.metadata.get("chunk_id", -1) - 1) in present:
+            text = text[overlap:].lstrip()
+        if text:
+            texts.append(text)
+    return texts
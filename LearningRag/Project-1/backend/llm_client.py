@@ -0,0 +1,22 @@
+import os
+
+import shared_path  # noqa: F401  (makes `shared` importable)
+from shared.llm_pool import LLMPool
+
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "huggingface")  # "stub" for tests/offline
+LLM_REPO_ID = os.getenv("LLM_REPO_ID", "mistralai/Mistral-7B-Instruct-v0.2")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+LLM_STUB_RESPONSE = os.getenv("LLM_STUB_RESPONSE", "This is a stub response.")
+
+# Shared chat clients and concurrency slots (see shared/llm_pool.py)
+pool = LLMPool(
+    backend=LLM_BACKEND,
+    repo_id=LLM_REPO_ID,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    timeout=LLM_TIMEOUT,
+    queue_timeout=LLM_QUEUE_TIMEOUT,
+    stub_response=LLM_STUB_RESPONSE
+)
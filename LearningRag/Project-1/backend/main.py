@@ -1,7 +1,11 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import shutil
 import os
+import tempfile
+import json
+from typing import Literal
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -13,14 +17,18 @@ from rag import (
     create_vector_store,
     load_vector_store,
     get_llm,
-    answer_question
+    answer_question,
+    stream_answer
 )
+from jobs import job_queue
 
 app = FastAPI()
 embeddings = get_embeddings()
 llm = get_llm()
 
-PDF_PATH = "resume.pdf"
+# Each upload gets its own file, deleted once indexed: a new upload must not
+# overwrite a PDF that a running job (and its worker processes) still reads
+UPLOAD_DIR = "uploads"
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,18 +41,81 @@ app.add_middleware(
 class Question(BaseModel):
     question: str
 
+def index_resume(job, pdf_path: str, source: str):
+    try:
+        job.checkpoint(0.0, "extracting pages")
+        chunks = load_and_chunk_pdf(pdf_path, source=source)
+    finally:
+        os.remove(pdf_path)
+
+    # Embedding is the slow part: report it as 10%..95%
+    def on_progress(done, total):
+        job.checkpoint(0.1 + 0.85 * done / max(total, 1), f"embedded {done}/{total} chunks")
+
+    create_vector_store(chunks, embeddings, on_progress=on_progress)
+    return {"chunks": len(chunks)}
+
 @app.post("/upload")
-def upload_resume(file: UploadFile = File(...)):
-    with open(PDF_PATH, "wb") as buffer:
+def upload_resume(
+    file: UploadFile = File(...),
+    priority: Literal["high", "normal", "low"] = "normal"
+):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf", dir=UPLOAD_DIR)
+    with os.fdopen(fd, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
 
-    chunks = load_and_chunk_pdf(PDF_PATH)
-    create_vector_store(chunks, embeddings)
+    # Indexed by the job queue; poll /jobs/{job_id} for progress. The job
+    # deletes the PDF itself, unless it is cancelled before it starts
+    job = job_queue.submit(
+        index_resume, pdf_path, file.filename,
+        name=file.filename, priority=priority,
+        on_cancel=lambda: os.remove(pdf_path)
+    )
+
+    return {"status": "Resume uploaded, indexing started", "job_id": job.id}
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": [job.to_dict() for job in job_queue.list()]}
 
-    return {"status": "Resume uploaded and indexed"}
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
 
 @app.post("/ask")
 def ask(q: Question):
-    db = load_vector_store(embeddings)
-    answer = answer_question(q.question, db, llm)
+    # Indexing jobs pause at their next checkpoint while questions run
+    with job_queue.interactive():
+        db = load_vector_store(embeddings)
+        answer = answer_question(q.question, db, llm)
     return {"answer": answer}
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+def ask_stream(q: Question):
+    def events():
+        try:
+            with job_queue.interactive():
+                db = load_vector_store(embeddings)
+                for token in stream_answer(q.question, db):
+                    yield _sse("token", token)
+        except Exception as e:
+            # The response has already started: report the failure in-band
+            yield _sse("error", {"detail": str(e)})
+        yield _sse("done", None)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+from chunker import CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, StructuredChunker, overlap_length, token_counter
+
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "backend/page_cache")
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_TASK = 8
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawn, not fork: the API process is multi-threaded and holds torch
+        _executor = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _object_digest(obj, memo, active=()):
+    # Digest of a PDF object with its indirect references resolved. Shared
+    # objects (fonts, forms) are hashed once per document via `memo`.
+    if isinstance(obj, IndirectObject):
+        ref = (obj.idnum, obj.generation)
+        if ref in memo:
+            return memo[ref]
+        if ref in active:
+            # Reference cycle: identify it by position instead of content
+            return hashlib.sha256(f"cycle:{ref}".encode()).digest()
+        memo[ref] = _object_digest(obj.get_object(), memo, active + (ref,))
+        return memo[ref]
+
+    digest = hashlib.sha256(type(obj).__name__.encode())
+    if isinstance(obj, DictionaryObject):
+        for key in sorted(obj):
+            if key != "/Parent":
+                digest.update(key.encode())
+                digest.update(_object_digest(obj[key], memo, active))
+        # Image pixels don't affect extracted text
+        if isinstance(obj, StreamObject) and obj.get("/Subtype") != "/Image":
+            digest.update(obj.get_data())
+    elif isinstance(obj, ArrayObject):
+        for item in obj:
+            digest.update(_object_digest(item, memo, active))
+    else:
+        digest.update(repr(obj).encode())
+    return digest.digest()
+
+
+def _page_key(page, memo):
+    # Content stream + resolved /Resources (fonts, form XObjects) + chunker
+    # settings and tokenizer: pages that only draw a form ("/Fm0 Do") have
+    # identical streams, so the resources must be part of the key too
+    contents = page.get_contents()
+    data = contents.get_data() if contents is not None else b""
+    digest = hashlib.sha256(data)
+    digest.update(_object_digest(page.get("/Resources"), memo))
+    digest.update(f"structured:{CHUNK_TOKENS}:{CHUNK_OVERLAP_TOKENS}:{token_counter.name}".encode())
+    return digest.hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(PAGE_CACHE_DIR, f"{key}.json")
+
+
+def _read_cache(key):
+    # A missing or unreadable entry is a miss; the page is re-extracted
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_cache(key, chunks):
+    # Write a private temp file and swap it in, so a concurrent reader or a
+    # crash mid-write never leaves a truncated entry behind
+    fd, tmp_path = tempfile.mkstemp(dir=PAGE_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(chunks, f)
+        os.replace(tmp_path, _cache_path(key))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _extract_and_split(pdf_path, page_numbers):
+    # Runs in a worker process: one reader per batch of pages
+    reader = PdfReader(pdf_path)
+    chunker = StructuredChunker()
+
+    results = {}
+    for n in page_numbers:
+        text = reader.pages[n].extract_text() or ""
+        results[n] = chunker.split_text(text)
+    return results
+
+
+def load_and_chunk_pdf(pdf_path, source=None):
+    """
+    Page-parallel PDF extraction + splitting. Pages whose content was seen
+    before are served from the per-page cache; the rest are spread over a
+    process pool in batches of PAGES_PER_TASK. `source` (default: pdf_path)
+    is recorded in each chunk's metadata.
+    """
+    reader = PdfReader(pdf_path)
+    memo = {}
+    keys = [_page_key(page, memo) for page in reader.pages]
+
+    page_chunks = {}
+    missing = []
+    for n, key in enumerate(keys):
+        chunks = _read_cache(key)
+        if chunks is None:
+            missing.append(n)
+        else:
+            page_chunks[n] = chunks
+
+    if missing:
+        batches = [
+            missing[i:i + PAGES_PER_TASK]
+            for i in range(0, len(missing), PAGES_PER_TASK)
+        ]
+        if len(batches) == 1:
+            results = [_extract_and_split(pdf_path, batches[0])]
+        else:
+            executor = _get_executor()
+            results = executor.map(_extract_and_split, [pdf_path] * len(batches), batches)
+
+        os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+        for result in results:
+            for n, chunks in result.items():
+                page_chunks[n] = chunks
+                _write_cache(keys[n], chunks)
+
+    # PyPDFLoader metadata layout, plus the chunk's position in its page and
+    # how many leading characters it repeats from the previous chunk
+    documents = []
+    for n in range(len(keys)):
+        chunks = page_chunks[n]
+        for i, chunk in enumerate(chunks):
+            documents.append(Document(
+                page_content=chunk,
+                metadata={
+                    "source": source or pdf_path,
+                    "page": n,
+                    "chunk_id": i,
+                    "overlap": overlap_length(chunks[i - 1], chunk) if i else 0
+                }
+            ))
+    return documents
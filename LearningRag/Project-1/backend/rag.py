@@ -1,21 +1,23 @@
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
 import os
+import threading
 from prompt import RESUME_PROMPT
-
-def load_and_chunk_pdf(pdf_path: str):
-    loader = PyPDFLoader(pdf_path)
-    documents = loader.load()
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=100
-    )
-
-    return splitter.split_documents(documents)
+from pdf_pipeline import load_and_chunk_pdf
+from chunker import count_tokens, strip_overlaps, truncate_to_tokens
+from llm_client import pool
+from vector_index import (
+    INDEX_TYPE,
+    build_index,
+    configure_search,
+    dequantize,
+    search
+)
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+import numpy as np
+import uuid
 
 def get_embeddings():
     return HuggingFaceEmbeddings(
@@ -24,36 +26,113 @@ def get_embeddings():
 
 VECTOR_PATH = "backend/vector_store/index"
 
-def create_vector_store(chunks, embeddings):
-    db = FAISS.from_documents(chunks, embeddings)
-    db.save_local(VECTOR_PATH)
+# One index build at a time (concurrent uploads would race on VECTOR_PATH),
+# and no load while the index files are being rewritten
+_build_lock = threading.Lock()
+_files_lock = threading.Lock()
+
+EMBED_BATCH_SIZE = 64
+
+def create_vector_store(chunks, embeddings, index_type=INDEX_TYPE, on_progress=None):
+    with _build_lock:
+        return _create_vector_store(chunks, embeddings, index_type, on_progress)
+
+def _create_vector_store(chunks, embeddings, index_type, on_progress):
+    # Like FAISS.from_documents, but with a selectable (trained) index type.
+    # on_progress(done, total) is called between embedding batches.
+    texts = [c.page_content for c in chunks]
+    vectors = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        if on_progress:
+            on_progress(start, len(texts))
+        vectors.extend(embeddings.embed_documents(texts[start:start + EMBED_BATCH_SIZE]))
+    ids = [str(uuid.uuid4()) for _ in chunks]
+
+    db = FAISS(
+        embedding_function=embeddings,
+        index=build_index(vectors, index_type),
+        docstore=InMemoryDocstore(dict(zip(ids, chunks))),
+        index_to_docstore_id=dict(enumerate(ids))
+    )
+    with _files_lock:
+        db.save_local(VECTOR_PATH)
     return db
 
 def load_vector_store(embeddings):
-    return FAISS.load_local(
-        VECTOR_PATH,
-        embeddings,
-        allow_dangerous_deserialization=True
+    with _files_lock:
+        db = FAISS.load_local(
+            VECTOR_PATH,
+            embeddings,
+            allow_dangerous_deserialization=True
+        )
+    configure_search(db.index)
+    return db
+
+
+FETCH_K = 12               # candidates over-fetched before reranking
+CONTEXT_TOKEN_BUDGET = 800 # max prompt tokens spent on resume context
+
+def pack_context(docs, token_budget=CONTEXT_TOKEN_BUDGET):
+    # Keep the best-ranked chunks that fit in the token budget. The top
+    # chunk is always kept (truncated if it alone exceeds the budget), so
+    # an oversized first hit can't leave the context empty.
+    packed, used = [], 0
+    for doc in docs:
+        tokens = count_tokens(doc.page_content)
+        if not packed and tokens > token_budget:
+            doc = Document(
+                page_content=truncate_to_tokens(doc.page_content, token_budget),
+                metadata=doc.metadata
+            )
+            tokens = count_tokens(doc.page_content)
+        if used + tokens <= token_budget:
+            packed.append(doc)
+            used += tokens
+    return packed
+
+def _run_stage(stage, fn, *args):
+    return fn(*args)
+
+def _rerank(query_vector, vector_store, ids, k):
+    # MMR over the candidates' decoded vectors; binary indexes decode from
+    # their SQ8 copy
+    selected = maximal_marginal_relevance(query_vector, dequantize(vector_store.index, ids), k=k)
+    return [
+        vector_store.docstore.search(vector_store.index_to_docstore_id[int(ids[i])])
+        for i in selected
+    ]
+
+def retrieve_context(query, vector_store, k=3, fetch_k=FETCH_K, stage=_run_stage):
+    # Over-fetch (re-scored for binary indexes), rerank with MMR (relevance
+    # vs. redundancy), then budget. Each step runs through
+    # stage(name, fn, *args), so callers such as benchmark_rag.py can time
+    # embedding, search, rerank and pack separately
+    query_vector = np.asarray(
+        stage("embedding", vector_store.embedding_function.embed_query, query),
+        dtype="float32"
     )
 
+    ids = stage("search", search, vector_store.index, query_vector[None, :], fetch_k)[0]
+    ids = ids[ids >= 0]
+    if len(ids) == 0:
+        return []
+
+    docs = stage("rerank", _rerank, query_vector, vector_store, ids, k)
+    return stage("pack", pack_context, docs)
 
-def retrieve_context(query, vector_store, k=3):
-    return vector_store.similarity_search(query, k=k)
 
+LLM_PARAMS = {"temperature": 0.2, "max_new_tokens": 300}
 
 def get_llm():
-    # First create the endpoint
-    llm = HuggingFaceEndpoint(
-        repo_id="mistralai/Mistral-7B-Instruct-v0.2",
-        temperature=0.2,
-        max_new_tokens=300
-    )
-    # Wrap it in ChatHuggingFace
-    return ChatHuggingFace(llm=llm)
+    # Shared client from the pool (built once, reused across requests)
+    return pool.get(**LLM_PARAMS)
 
-def answer_question(question, vector_store, llm):
-    docs = retrieve_context(question, vector_store)
-    context = "\n\n".join(doc.page_content for doc in docs)
+def _build_messages(question, vector_store):
+    return _messages_for(question, retrieve_context(question, vector_store))
+
+def _messages_for(question, docs):
+    # Text shared by adjacent chunks is sent once
+    context = "\n\n".join(strip_overlaps(docs))
     
     prompt = RESUME_PROMPT.format(
         context=context,
@@ -62,7 +141,16 @@ def answer_question(question, vector_store, llm):
     
     # Use invoke with message format
     from langchain_core.messages import HumanMessage
-    messages = [HumanMessage(content=prompt)]
-    response = llm.invoke(messages)
+    return [HumanMessage(content=prompt)]
+
+def answer_question(question, vector_store, llm):
+    messages = _build_messages(question, vector_store)
+    with pool.slot():
+        response = llm.invoke(messages)
     
-    return response.content
\ No newline at end of file
+    return response.content
+
+def stream_answer(question, vector_store):
+    # Yields answer fragments as the model generates them
+    messages = _build_messages(question, vector_store)
+    yield from pool.stream(messages, **LLM_PARAMS)
@@ -0,0 +1,499 @@
+"""
+Analytics Engine
+
+Answers historical questions (AnalyticsIntent) directly from the loaded
+data: no LLM and no model fit.
+
+Each (entity, metric) series is indexed once:
+- prefix sums of values and of daily log returns (and their squares), so
+  sums, averages, period returns and volatility over any date range are O(1)
+- sparse tables of argmax/argmin, so range max/min (and their dates) are O(1)
+- moving averages over a range come from the same prefix sums in one
+  vectorized pass; EMA and rolling volatility come from the indicator store
+
+Indexes are rebuilt when the entity's data file changes.
+"""
+
+import math
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_loader import METRIC_COLUMNS, get_entity_path, load_stock_data
+from indicators import indicator_name, indicator_store
+from schema import AnalyticsIntent
+
+
+TRADING_DAYS_PER_YEAR = 252
+DEFAULT_MA_WINDOW = 20
+
+
+# ============================================================================
+# Range-query index
+# ============================================================================
+
+class SeriesIndex:
+    """Precomputed O(1) range queries over one dated series."""
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray):
+        self.dates = dates.astype("datetime64[ns]")
+        self.values = values.astype(np.float64)
+        n = len(self.values)
+
+        self.prefix = np.concatenate([[0.0], np.cumsum(self.values)])
+
+        # Daily log returns; returns[t] is from day t to day t + 1. Returns
+        # touching a missing or non-positive value are masked out of the
+        # sums and the count, not counted as a flat day
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(np.log(self.values))
+        valid = np.isfinite(returns)
+        returns = np.where(valid, returns, 0.0)
+        self.returns_prefix = np.concatenate([[0.0], np.cumsum(returns)])
+        self.returns_sq_prefix = np.concatenate([[0.0], np.cumsum(returns ** 2)])
+        self.returns_count = np.concatenate([[0], np.cumsum(valid)])
+
+        self._argmax = self._sparse_table(n, np.greater_equal)
+        self._argmin = self._sparse_table(n, np.less_equal)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _sparse_table(self, n: int, better) -> List[np.ndarray]:
+        # Level k holds the best index of every window [i, i + 2^k)
+        table = [np.arange(n)]
+        k = 1
+        while (1 << k) <= n:
+            prev, half = table[-1], 1 << (k - 1)
+            left, right = prev[:n - (1 << k) + 1], prev[half:half + n - (1 << k) + 1]
+            table.append(np.where(better(self.values[left], self.values[right]), left, right))
+            k += 1
+        return table
+
+    def _range_best(self, table: List[np.ndarray], i: int, j: int, better) -> int:
+        k = int(j - i).bit_length() - 1
+        a, b = table[k][i], table[k][j - (1 << k)]
+        return int(a if better(self.values[a], self.values[b]) else b)
+
+    # ----- range queries on [i, j) -----
+
+    def locate(self, start: pd.Timestamp, end: pd.Timestamp) -> Tuple[int, int]:
+        """Index range [i, j) of the points dated within [start, end]."""
+        i = int(np.searchsorted(self.dates, np.datetime64(start, "ns"), side="left"))
+        j = int(np.searchsorted(self.dates, np.datetime64(end, "ns"), side="right"))
+        return i, j
+
+    def total(self, i: int, j: int) -> float:
+        return float(self.prefix[j] - self.prefix[i])
+
+    def mean(self, i: int, j: int) -> float:
+        return self.total(i, j) / (j - i)
+
+    def argmax(self, i: int, j: int) -> int:
+        return self._range_best(self._argmax, i, j, np.greater_equal)
+
+    def argmin(self, i: int, j: int) -> int:
+        return self._range_best(self._argmin, i, j, np.less_equal)
+
+    def period_return(self, i: int, j: int) -> Optional[float]:
+        """Simple return from the first to the last point of the range (None if either is missing or not positive)."""
+        first, last = self.values[i], self.values[j - 1]
+        if not (first > 0 and last > 0 and math.isfinite(first) and math.isfinite(last)):
+            return None
+        return float(last / first - 1)
+
+    def volatility(self, i: int, j: int) -> Optional[float]:
+        """Sample std of the valid daily log returns inside the range (None if < 2 returns)."""
+        m = int(self.returns_count[j - 1] - self.returns_count[i]) if j > i else 0
+        if m < 2:
+            return None
+        s1 = self.returns_prefix[j - 1] - self.returns_prefix[i]
+        s2 = self.returns_sq_prefix[j - 1] - self.returns_sq_prefix[i]
+        return float(math.sqrt(max(s2 - s1 * s1 / m, 0.0) / (m - 1)))
+
+    def moving_average(self, i: int, j: int, window: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions and trailing `window`-point averages for every point in [i, j) with a full window."""
+        ends = np.arange(max(i, window - 1), j) + 1
+        return ends - 1, (self.prefix[ends] - self.prefix[ends - window]) / window
+
+
+# ============================================================================
+# Intent normalization
+# ============================================================================
+
+_OPERATIONS = [
+    ("rank", r"rank|\btop\b|best|worst|compare|comparison"),
+    ("ema", r"\bema\b|exponential"),
+    ("rolling_volatility", r"rolling vol|rolling std|volatility_\d+"),
+    ("moving_average", r"moving|rolling|\bsma\b|\bma\s*\d*\b"),
+    ("volatility", r"volatil|std|standard deviation|risk"),
+    ("return", r"return|change|growth|perform|gain"),
+    ("max", r"\bmax|highest|peak"),
+    ("min", r"\bmin|lowest|trough|bottom"),
+    ("sum", r"\bsum\b|total"),
+    ("average", r"avg|average|mean|typical"),
+    ("latest", r"latest|current|today|now"),
+]
+
+
+def normalize_operation(text: Optional[str], exclude: Tuple[str, ...] = ()) -> Optional[str]:
+    """Map free-text operation (e.g. "50-day moving average") to an engine operation."""
+    if not text:
+        return None
+    text = text.lower()
+    for operation, pattern in _OPERATIONS:
+        if operation not in exclude and re.search(pattern, text):
+            return operation
+    return None
+
+
+def normalize_metric(text: str) -> str:
+    """Map free-text metric (e.g. "trading volume", "closing price") to a METRIC_COLUMNS key."""
+    text = (text or "").lower()
+    if text in METRIC_COLUMNS:
+        return text
+    if "volume" in text:
+        return "volume"
+    if re.search(r"\bopen", text):
+        return "open"
+    if re.search(r"\bhigh\b", text):
+        return "high"
+    if re.search(r"\blow\b", text):
+        return "low"
+    return "close_price"
+
+
+def is_ranking(intent: AnalyticsIntent) -> bool:
+    """Whether the intent compares entities (no entity, or a ranking operation)."""
+    return not intent.entity or normalize_operation(intent.operation) == "rank"
+
+
+def parse_window(text: Optional[str], default: int = DEFAULT_MA_WINDOW) -> int:
+    """
+    Window length named in free text ("50-day moving average" -> 50).
+
+    Raises:
+        ValueError: If the window is below 1 (answered with a clarification)
+    """
+    match = re.search(r"(\d+)", text or "")
+    window = int(match.group(1)) if match else default
+    if window < 1:
+        raise ValueError(f"A window must be at least 1 point, got {window}")
+    return window
+
+
+# ============================================================================
+# Time ranges
+# ============================================================================
+
+_MONTHS = {m: i for i, m in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july",
+     "august", "september", "october", "november", "december"], start=1
+)}
+
+_UNIT_OFFSETS = {
+    "day": lambda n: pd.DateOffset(days=n),
+    "week": lambda n: pd.DateOffset(weeks=n),
+    "month": lambda n: pd.DateOffset(months=n),
+    "quarter": lambda n: pd.DateOffset(months=3 * n),
+    "year": lambda n: pd.DateOffset(years=n),
+}
+
+
+def parse_time_range(
+    text: Optional[str],
+    first: pd.Timestamp,
+    last: pd.Timestamp
+) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    Parse a time range relative to the data (relative ranges end at the
+    last available date, not today).
+
+    Supports: "last 30 days", "past 3 months", "last year", "ytd",
+    "this month", "2024", "Q1 2025", "March 2025", "since 2024-06-01",
+    "2024-01-01 to 2024-06-30", "all time".
+
+    Args:
+        text: Human-readable range from the intent
+        first: First date in the data
+        last: Last date in the data
+
+    Returns:
+        Inclusive (start, end) dates
+
+    Raises:
+        ValueError: If the range cannot be understood
+    """
+    text = (text or "").lower().strip()
+
+    if text in ("", "all", "all time", "max", "full history", "entire history", "overall"):
+        return first, last
+
+    dates = re.findall(r"\d{4}-\d{2}-\d{2}", text)
+    if len(dates) == 2:
+        return pd.Timestamp(dates[0]), pd.Timestamp(dates[1])
+    if len(dates) == 1 and re.search(r"since|from|after", text):
+        return pd.Timestamp(dates[0]), last
+
+    match = re.search(r"(last|past|previous|trailing)\s+(\d+)?\s*(day|week|month|quarter|year)s?", text)
+    if match:
+        n = int(match.group(2) or 1)
+        return last - _UNIT_OFFSETS[match.group(3)](n) + pd.Timedelta(days=1), last
+
+    if re.search(r"\bytd\b|year to date|this year", text):
+        return pd.Timestamp(year=last.year, month=1, day=1), last
+    if "this month" in text:
+        return pd.Timestamp(year=last.year, month=last.month, day=1), last
+    if "this quarter" in text:
+        return pd.Timestamp(year=last.year, month=3 * ((last.month - 1) // 3) + 1, day=1), last
+
+    match = re.search(r"q([1-4])\s*'?(\d{4})|(\d{4})\s*q([1-4])", text)
+    if match:
+        quarter = int(match.group(1) or match.group(4))
+        year = int(match.group(2) or match.group(3))
+        start = pd.Timestamp(year=year, month=3 * (quarter - 1) + 1, day=1)
+        return start, start + pd.DateOffset(months=3) - pd.Timedelta(days=1)
+
+    match = re.search(r"(" + "|".join(_MONTHS) + r")\s+(\d{4})", text)
+    if match:
+        start = pd.Timestamp(year=int(match.group(2)), month=_MONTHS[match.group(1)], day=1)
+        return start, start + pd.DateOffset(months=1) - pd.Timedelta(days=1)
+
+    match = re.search(r"\b(19|20)\d{2}\b", text)
+    if match:
+        year = int(match.group(0))
+        if re.search(r"since|from|after", text):
+            return pd.Timestamp(year=year, month=1, day=1), last
+        return pd.Timestamp(year=year, month=1, day=1), pd.Timestamp(year=year, month=12, day=31)
+
+    raise ValueError(f"Could not understand time range '{text}'")
+
+
+# ============================================================================
+# Engine
+# ============================================================================
+
+class AnalyticsEngine:
+    """Runs AnalyticsIntents against cached per-entity SeriesIndexes."""
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, str], Tuple[float, SeriesIndex]] = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, entity: str, metric: str) -> SeriesIndex:
+        """
+        Get the (cached) index for an entity's metric.
+
+        Args:
+            entity: Entity name
+            metric: METRIC_COLUMNS key
+
+        Returns:
+            SeriesIndex, rebuilt if the data file changed
+        """
+        path = get_entity_path(entity)
+        mtime = os.path.getmtime(path)
+        key = (entity.upper(), metric)
+
+        with self._lock:
+            cached = self._indexes.get(key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+        df = load_stock_data(path)
+        index = SeriesIndex(df["ds"].to_numpy(), df[METRIC_COLUMNS[metric]].to_numpy())
+        with self._lock:
+            self._indexes[key] = (mtime, index)
+        return index
+
+    def run(self, intent: AnalyticsIntent) -> Dict[str, Any]:
+        """
+        Execute a single-entity analytics intent (see is_ranking).
+
+        Args:
+            intent: AnalyticsIntent from the Router LLM
+
+        Returns:
+            Result dict (entity, metric, operation, range, value/series/stats)
+            plus a template "summary"
+
+        Raises:
+            ValueError: Unknown entity, unparseable time range or empty range
+        """
+        metric = normalize_metric(intent.metric)
+        operation = (
+            normalize_operation(intent.operation)
+            or normalize_operation(intent.metric)
+            or "summary"
+        )
+
+        if is_ranking(intent):
+            raise ValueError("Rankings across entities are answered by the ranking engine")
+
+        result = self.compute(intent.entity, metric, operation, intent.operation, intent.time_range)
+        result["summary"] = summarize(result)
+        return result
+
+    def _resolve(self, entity: str, metric: str, time_range: str):
+        index = self.get_index(entity, metric)
+        first, last = pd.Timestamp(index.dates[0]), pd.Timestamp(index.dates[-1])
+        start, end = parse_time_range(time_range, first, last)
+        i, j = index.locate(start, end)
+        if j <= i:
+            raise ValueError(
+                f"No {entity} data between {start.date()} and {end.date()} "
+                f"(available: {first.date()} to {last.date()})"
+            )
+        return index, i, j
+
+    def compute(
+        self,
+        entity: str,
+        metric: str,
+        operation: str,
+        operation_text: Optional[str],
+        time_range: str
+    ) -> Dict[str, Any]:
+        index, i, j = self._resolve(entity, metric, time_range)
+        day = lambda k: str(pd.Timestamp(index.dates[k]).date())
+
+        result: Dict[str, Any] = {
+            "entity": entity.upper(),
+            "metric": metric,
+            "operation": operation,
+            "start": day(i),
+            "end": day(j - 1),
+            "points": j - i
+        }
+
+        if operation == "average":
+            result["value"] = index.mean(i, j)
+        elif operation == "sum":
+            result["value"] = index.total(i, j)
+        elif operation == "latest":
+            result["value"], result["date"] = float(index.values[j - 1]), day(j - 1)
+        elif operation in ("max", "min"):
+            k = index.argmax(i, j) if operation == "max" else index.argmin(i, j)
+            result["value"], result["date"] = float(index.values[k]), day(k)
+        elif operation == "return":
+            result["value"] = index.period_return(i, j)
+        elif operation == "volatility":
+            daily = index.volatility(i, j)
+            result["value"] = daily * math.sqrt(TRADING_DAYS_PER_YEAR) if daily is not None else None
+            result["daily_volatility"] = daily
+        elif operation == "moving_average":
+            window = parse_window(operation_text)
+            if window > j:
+                raise ValueError(f"Not enough history for a {window}-point moving average")
+            positions, averages = index.moving_average(i, j, window)
+            result["window"] = window
+            result["series"] = [
+                {"ds": day(k), "value": round(float(v), 4)}
+                for k, v in zip(positions, averages)
+            ]
+            result["value"] = float(averages[-1])
+        elif operation in ("ema", "rolling_volatility"):
+            kind = "ema" if operation == "ema" else "volatility"
+            window = parse_window(operation_text)
+            name = indicator_name(metric, kind, window)
+            indicators = indicator_store.get(entity, [name])
+            a, b = indicators.locate(pd.Timestamp(index.dates[i]), pd.Timestamp(index.dates[j - 1]))
+            result["window"] = window
+            result["indicator"] = name
+            result["series"] = [
+                {"ds": str(pd.Timestamp(d).date()), "value": round(float(v), 6)}
+                for d, v in zip(indicators.dates[a:b], indicators.column(name)[a:b])
+                if not np.isnan(v)
+            ]
+            if not result["series"]:
+                raise ValueError(f"Not enough history for {name}")
+            result["value"] = result["series"][-1]["value"]
+        else:
+            kmax, kmin = index.argmax(i, j), index.argmin(i, j)
+            daily = index.volatility(i, j)
+            result["stats"] = {
+                "latest": float(index.values[j - 1]),
+                "average": index.mean(i, j),
+                "max": float(index.values[kmax]),
+                "max_date": day(kmax),
+                "min": float(index.values[kmin]),
+                "min_date": day(kmin),
+                "return": index.period_return(i, j),
+                "volatility": daily * math.sqrt(TRADING_DAYS_PER_YEAR) if daily is not None else None
+            }
+        return result
+
+
+# ============================================================================
+# Summaries
+# ============================================================================
+
+_PERCENT_OPERATIONS = ("return", "volatility")
+
+
+def _format_value(value: Optional[float], metric: str, operation: str) -> str:
+    if value is None:
+        return "n/a"
+    if operation in _PERCENT_OPERATIONS:
+        return f"{value * 100:.2f}%"
+    if metric == "volume":
+        return f"{value:,.0f}"
+    return f"{value:,.2f}"
+
+
+def summarize(result: Dict[str, Any]) -> str:
+    """Template summary of an analytics result (no LLM)."""
+    metric = result["metric"].replace("_", " ")
+    operation = result["operation"]
+
+    if operation == "rank":
+        top = ", ".join(
+            f"{r['entity']} ({_format_value(r['value'], result['metric'], result['measure'])})"
+            for r in result["rankings"][:10]
+        )
+        order = "Top" if result.get("descending", True) else "Bottom"
+        return (
+            f"{order} {len(result['rankings'])} of {result.get('entities', len(result['rankings']))} "
+            f"by {result['measure']} of {metric} ({result['time_range'] or 'all time'}): {top or 'no data'}."
+        )
+
+    entity = result["entity"]
+    days = "trading day" if result["points"] == 1 else "trading days"
+    period = f"from {result['start']} to {result['end']} ({result['points']} {days})"
+    value = _format_value(result.get("value"), result["metric"], operation)
+
+    if operation == "average":
+        return f"{entity} {metric} averaged {value} {period}."
+    if operation == "sum":
+        return f"Total {entity} {metric} was {value} {period}."
+    if operation == "latest":
+        return f"The latest {entity} {metric} is {value} ({result['date']})."
+    if operation in ("max", "min"):
+        word = "highest" if operation == "max" else "lowest"
+        return f"The {word} {entity} {metric} {period} was {value} on {result['date']}."
+    if operation == "return":
+        return f"{entity} {metric} changed by {value} {period}."
+    if operation == "volatility":
+        return f"{entity} annualized volatility of {metric} was {value} {period}."
+    if operation == "moving_average":
+        return f"The {result['window']}-day moving average of {entity} {metric} was {value} on {result['end']}."
+    if operation == "ema":
+        return f"The {result['window']}-day EMA of {entity} {metric} was {value} on {result['end']}."
+    if operation == "rolling_volatility":
+        daily = _format_value(result["value"], result["metric"], "volatility")
+        return f"The {result['window']}-day rolling volatility of {entity} {metric} was {daily} (daily) on {result['end']}."
+
+    stats = result["stats"]
+    fmt = lambda key, op="average": _format_value(stats[key], result["metric"], op)
+    return (
+        f"{entity} {metric} {period}: latest {fmt('latest')}, average {fmt('average')}, "
+        f"high {fmt('max')} ({stats['max_date']}), low {fmt('min')} ({stats['min_date']}), "
+        f"return {fmt('return', 'return')}, annualized volatility {fmt('volatility', 'volatility')}."
+    )
+
+
+analytics_engine = AnalyticsEngine()
@@ -0,0 +1,253 @@
+"""
+Router Prompt Benchmark
+
+Compares the compiled router prompt (router_prompt.py) with the original
+hand-written prompt it replaced: prompt size per request, how much of it
+is a stable prefix, and Router LLM latency.
+
+    python benchmark_router_prompt.py
+    python benchmark_router_prompt.py --runs 20 --tokenizer mistralai/Mistral-7B-Instruct-v0.2
+
+Token counts use the given Hugging Face tokenizer when transformers is
+installed, otherwise a ~4 characters/token estimate. Latency calls the
+configured backend (LLM_BACKEND); with the stub backend it only measures
+client overhead.
+"""
+
+import argparse
+import os
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from llm_client import pool
+from router_llm import ROUTER_LLM_PARAMS
+from router_prompt import build_router_messages
+from schema import ForecastingIntent, RouterOutput
+
+
+# ============================================================================
+# Legacy prompt (as shipped before router_prompt.py)
+# ============================================================================
+
+LEGACY_SYSTEM_PROMPT = """
+You are a Router LLM for a data copilot.
+
+You NEVER answer questions.
+You ONLY decide which pipeline should handle the request.
+
+AVAILABLE ROUTES:
+- analytics: past or present metrics, rankings, trends
+- forecast: future predictions
+- rag: definitions, explanations, documentation
+- both: analytics + rag
+- clarification: missing required information
+
+RULES:
+- Output MUST be valid JSON
+- Do NOT include explanations
+- Do NOT invent metrics or entities
+- If required parameters are missing, use route = "clarification"
+
+CONVERSATION CONTEXT RULES:
+
+- You may receive a PREVIOUS INTENT.
+- If the user asks a follow-up:
+  - Inherit all fields from the previous intent
+  - Override ONLY the fields explicitly mentioned
+- If a follow-up changes the meaning ambiguously:
+  - route MUST be "clarification"
+- If there is no previous intent:
+  - treat the question as a new request
+
+PREVIOUS INTENT (if any):
+You are a Router LLM for a data copilot.
+
+You NEVER answer questions.
+You ONLY decide which pipeline should handle the request.
+
+AVAILABLE ROUTES:
+- analytics: past or present metrics, rankings, trends
+- forecast: future predictions
+- rag: definitions, explanations, documentation
+- both: analytics + rag
+- clarification: missing required information
+
+GENERAL RULES:
+- Output MUST be valid JSON
+- Do NOT include explanations
+- Do NOT invent metrics or entities
+- Do NOT infer missing values
+- If required parameters are missing or unclear, use route = "clarification"
+
+CONVERSATION CONTEXT RULES:
+
+- You may receive a PREVIOUS INTENT.
+- If the user asks a follow-up:
+  - Inherit ALL fields from the previous intent
+  - Override ONLY the fields explicitly mentioned
+- If the new question requires a DIFFERENT route than the previous one:
+  - You MUST discard incompatible intent fields
+- NEVER mix incompatible intents across routes
+
+AMBIGUITY RULES (STRICT):
+
+A request is ambiguous if:
+- The comparison type is unclear (e.g. “compare it”)
+- The metric is unspecified or vague
+- The time range is missing or underspecified
+- The entity is unclear
+- Multiple interpretations are equally valid
+
+If ambiguity exists:
+- route MUST be "clarification"
+- needs_clarification MUST be true
+- ALL intent fields MUST be null
+
+If there is no previous intent:
+- Treat the question as a new request
+
+PREVIOUS INTENT (if any):
+{previous_intent}
+
+ROUTING RULES (STRICT):
+
+- If route = "analytics":
+  analytics_intent MUST be present and non-null
+  forecast_intent MUST be null
+  rag_intent MUST be null
+
+- If route = "forecast":
+  forecast_intent MUST be present and non-null
+  analytics_intent MUST be null
+  rag_intent MUST be null
+
+- If route = "rag":
+  rag_intent MUST be present and non-null
+  analytics_intent MUST be null
+  forecast_intent MUST be null
+
+- If route = "both":
+  analytics_intent MUST be present and non-null
+  rag_intent MUST be present and non-null
+  forecast_intent MUST be null
+
+- If required fields cannot be determined:
+  route MUST be "clarification"
+  needs_clarification MUST be true
+  ALL intent fields MUST be null
+
+NEVER return a route without its required intent.
+
+AMBIGUITY RULES:
+If an analytics request does not specify a concrete entity
+(e.g. uses generic terms like "assets", "products", "items"):
+- route MUST be "clarification"
+- needs_clarification MUST be true
+- ALL intent fields MUST be null
+
+
+OUTPUT RULES (STRICT):
+
+- You MUST output ALL fields defined in the schema
+- You MUST always include "needs_clarification"
+- Set "needs_clarification" = true ONLY when route = "clarification"
+- Set "needs_clarification" = false for all other routes
+- NEVER omit required fields
+- NEVER include extra fields
+
+{format_instructions}
+
+"""
+
+legacy_prompt = ChatPromptTemplate.from_messages([
+    ("system", LEGACY_SYSTEM_PROMPT),
+    ("user", "{question}"),
+])
+
+
+def build_legacy_messages(
+    question: str,
+    previous_intent: Optional[RouterOutput] = None
+) -> List[BaseMessage]:
+    """Messages exactly as the original route_question built them."""
+    parser = PydanticOutputParser(pydantic_object=RouterOutput)
+    return legacy_prompt.format_prompt(
+        question=question,
+        previous_intent=previous_intent.model_dump() if previous_intent else "None",
+        format_instructions=parser.get_format_instructions()
+    ).messages
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+QUESTIONS = [
+    ("Forecast AAPL closing price for the next 30 days", None),
+    ("What was the average AAPL volume last quarter?", None),
+    ("What does volatility mean?", None),
+    ("What about 90 days?", RouterOutput(
+        route="forecast",
+        forecast_intent=ForecastingIntent(entity="AAPL", metric="close_price", horizon="30 days")
+    )),
+]
+
+
+def get_token_counter(tokenizer_name: Optional[str]) -> Callable[[str], int]:
+    if tokenizer_name:
+        try:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+        except (ImportError, OSError) as e:
+            print(f"Tokenizer unavailable ({e}); using the 4 chars/token estimate")
+    return lambda text: -(-len(text) // 4)
+
+
+def shared_prefix(a: str, b: str) -> str:
+    return a[:len(os.path.commonprefix([a, b]))]
+
+
+def measure(name: str, build, count_tokens, runs: int, with_llm: bool):
+    prompts = [
+        "\n".join(m.content for m in build(question, previous))
+        for question, previous in QUESTIONS
+    ]
+    tokens = [count_tokens(p) for p in prompts]
+
+    # The part of the prompt a prefix cache can reuse across requests
+    prefix = prompts[0]
+    for p in prompts[1:]:
+        prefix = shared_prefix(prefix, p)
+    prefix_tokens = count_tokens(prefix)
+
+    print(f"{name}")
+    print(f"  prompt tokens      mean {np.mean(tokens):.0f}  min {min(tokens)}  max {max(tokens)}")
+    print(f"  stable prefix      {prefix_tokens} tokens ({prefix_tokens / np.mean(tokens):.0%} of the prompt)")
+
+    if with_llm:
+        latencies = []
+        for _ in range(runs):
+            for question, previous in QUESTIONS:
+                start = time.perf_counter()
+                pool.invoke(build(question, previous), **ROUTER_LLM_PARAMS)
+                latencies.append((time.perf_counter() - start) * 1000)
+        p50, p95 = np.percentile(latencies, [50, 95])
+        print(f"  latency            p50 {p50:.0f} ms  p95 {p95:.0f} ms  ({len(latencies)} calls)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="latency rounds over the question set")
+    parser.add_argument("--tokenizer", default=None, help="Hugging Face tokenizer for exact counts")
+    parser.add_argument("--no-llm", action="store_true", help="only report prompt sizes")
+    args = parser.parse_args()
+
+    count_tokens = get_token_counter(args.tokenizer)
+    measure("legacy prompt", build_legacy_messages, count_tokens, args.runs, not args.no_llm)
+    measure("compiled prompt", build_router_messages, count_tokens, args.runs, not args.no_llm)
@@ -0,0 +1,229 @@
+"""
+Conversation Sessions
+
+Server-side ConversationState per session, so follow-up questions are
+routed with the previous intent instead of from scratch.
+
+- Sessions expire after SESSION_TTL seconds of inactivity and the store
+  holds at most SESSION_MAX_SESSIONS (least recently used are dropped)
+- Follow-ups that only change a field ("what about 90 days?", "and
+  weekly?") are resolved without the Router LLM
+- Each session keeps its last fitted forecast pipeline, so a horizon-only
+  follow-up re-predicts from the fitted model instead of refitting
+
+Environment:
+- SESSION_TTL: idle seconds before a session expires (default 1800)
+- SESSION_MAX_SESSIONS: max sessions held in memory (default 256)
+"""
+
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from analytics_engine import normalize_operation
+from data_loader import get_available_entities
+from schema import ConversationState, RouterOutput
+
+
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "1800"))
+SESSION_MAX_SESSIONS = int(os.environ.get("SESSION_MAX_SESSIONS", "256"))
+
+
+class Session:
+    """One conversation: routing state plus its last fitted forecast."""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.state = ConversationState()
+        # Last fitted ForecastingPipeline and the fit inputs it was built from
+        self.pipeline = None
+        self.fit_key: Optional[tuple] = None
+        self.lock = threading.Lock()
+
+    def remember(self, router_output: RouterOutput):
+        """
+        Record the latest routing decision.
+
+        Clarifications keep the previous intent, so the user's answer can
+        still inherit from it.
+        """
+        self.state.last_route = router_output.route
+        if router_output.route != "clarification":
+            self.state.last_intent = router_output
+
+
+class SessionStore:
+    """Thread-safe, TTL-evicted, size-bounded map of session ID -> Session."""
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, tuple[Session, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        """
+        Look up a live session and refresh its expiry.
+
+        Args:
+            session_id: Session ID from the client (may be None)
+
+        Returns:
+            The session, or None if unknown or expired
+        """
+        if not session_id:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            session, expires_at = entry
+            if expires_at <= now:
+                del self._sessions[session_id]
+                return None
+            self._sessions[session_id] = (session, now + self.ttl)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id: Optional[str]) -> Session:
+        """
+        Resume a session, or start a new one (with a fresh ID) when the
+        given ID is missing, unknown or expired.
+        """
+        session = self.get(session_id)
+        if session is not None:
+            return session
+
+        session = Session(uuid.uuid4().hex)
+        with self._lock:
+            self._sessions[session.id] = (session, time.monotonic() + self.ttl)
+            self._evict()
+        return session
+
+    def _evict(self):
+        # Called with the lock held: expired sessions first, then LRU
+        now = time.monotonic()
+        for session_id in [sid for sid, (_, exp) in self._sessions.items() if exp <= now]:
+            del self._sessions[session_id]
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"sessions": len(self._sessions), "max_sessions": self.max_sessions}
+
+
+session_store = SessionStore()
+
+
+# ============================================================================
+# Follow-up resolution
+# ============================================================================
+
+MAX_FOLLOW_UP_WORDS = 8
+
+_FOLLOW_UP_RE = re.compile(
+    r"^\s*(what about|how about|and|now|instead|same|make it|extend|try|then|over|for)\b",
+    re.IGNORECASE
+)
+_HORIZON_RE = re.compile(r"\b(\d+)\s*(day|week|month|quarter|year)s?\b", re.IGNORECASE)
+_TICKER_RE = re.compile(r"\b[A-Za-z][A-Za-z0-9]{0,5}\b")
+
+_GRANULARITIES = {
+    "daily": "daily",
+    "weekly": "weekly",
+    "monthly": "monthly",
+    "quarterly": "quarterly"
+}
+
+_METRICS = {
+    "volume": "volume",
+    "close": "close_price",
+    "closing": "close_price",
+    "high": "high",
+    "open": "open",
+    "opening": "open",
+    "low": "low"
+}
+
+
+# Words the follow-up vocabulary explains; never read as tickers
+_VOCABULARY_RE = re.compile(
+    r"\b(" + "|".join(list(_GRANULARITIES) + list(_METRICS)) + r")\b",
+    re.IGNORECASE
+)
+
+
+def _find_word(question: str, words: Dict[str, str]) -> Optional[str]:
+    for word, value in words.items():
+        if re.search(rf"\b{word}\b", question, re.IGNORECASE):
+            return value
+    return None
+
+
+def resolve_follow_up(question: str, previous: Optional[RouterOutput]) -> Optional[RouterOutput]:
+    """
+    Resolve a short forecast follow-up by overriding fields of the previous
+    intent, without calling the Router LLM.
+
+    Args:
+        question: The new question
+        previous: The session's last routed intent
+
+    Returns:
+        The updated RouterOutput, or None when the question is not a
+        recognizable field-only follow-up (route it with the LLM instead)
+    """
+    if previous is None or previous.route != "forecast" or previous.forecast_intent is None:
+        return None
+
+    n_words = len(question.split())
+    if n_words > MAX_FOLLOW_UP_WORDS or (n_words > 4 and not _FOLLOW_UP_RE.match(question)):
+        return None
+
+    # "what about the top 5?" or "and the volatility?" asks for analytics or
+    # a ranking, not a changed forecast ("now" is a follow-up word here)
+    if normalize_operation(question, exclude=("latest",)):
+        return None
+
+    changes: Dict[str, Any] = {}
+
+    horizon = _HORIZON_RE.search(question)
+    if horizon:
+        periods, unit = int(horizon.group(1)), horizon.group(2).lower()
+        if unit == "year":
+            periods, unit = periods * 12, "month"
+        changes["horizon"] = f"{periods} {unit}s"
+
+    granularity = _find_word(question, _GRANULARITIES)
+    if granularity:
+        changes["granularity"] = granularity
+
+    metric = _find_word(question, _METRICS)
+    if metric:
+        changes["metric"] = metric
+
+    # Entities match case-insensitively ("aapl"); an all-caps word that is
+    # neither an entity nor follow-up vocabulary ("DAYS", "WEEKLY") is an
+    # unknown ticker
+    rest = _FOLLOW_UP_RE.sub(" ", question, count=1)
+    rest = _VOCABULARY_RE.sub(" ", _HORIZON_RE.sub(" ", rest))
+    known = {e.upper(): e for e in get_available_entities()}
+    for word in _TICKER_RE.findall(rest):
+        if word.upper() in known:
+            changes["entity"] = known[word.upper()]
+        elif word.isupper() and len(word) > 1:
+            # Unknown entity: let the router decide (or ask)
+            return None
+
+    if not changes:
+        return None
+
+    intent = previous.forecast_intent.model_copy(update=changes)
+    return RouterOutput(route="forecast", forecast_intent=intent)
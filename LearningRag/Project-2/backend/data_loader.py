@@ -7,10 +7,20 @@ Handles the AAPL stock data format used in the hackathon demo.
 
 import pandas as pd
 import os
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 # Path to the data directory (relative to backend folder)
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..")
+DATA_FILE_SUFFIX = "_stock_data.csv"
+
+# Metric names used by intents -> columns of load_stock_data()
+METRIC_COLUMNS = {
+    "close_price": "y",
+    "volume": "Volume",
+    "high": "High",
+    "low": "Low",
+    "open": "Open"
+}
 
 
 def load_stock_data(file_path: str = None) -> pd.DataFrame:
@@ -49,15 +59,70 @@ def load_stock_data(file_path: str = None) -> pd.DataFrame:
     return historical_data
 
 
+# (DATA_DIR, directory mtime) -> entity files, so lookups don't re-list it
+_entity_files_cache: Dict[tuple, Dict[str, str]] = {}
+
+
+def _entity_files() -> Dict[str, str]:
+    # Shared cached listing; callers must not modify it
+    key = (DATA_DIR, os.stat(DATA_DIR).st_mtime_ns)
+    files = _entity_files_cache.get(key)
+    if files is None:
+        files = {
+            name[:-len(DATA_FILE_SUFFIX)]: os.path.join(DATA_DIR, name)
+            for name in sorted(os.listdir(DATA_DIR))
+            if name.endswith(DATA_FILE_SUFFIX)
+        }
+        _entity_files_cache.clear()
+        _entity_files_cache[key] = files
+    return files
+
+
+def get_entity_files() -> Dict[str, str]:
+    """
+    Find the data file of every entity.
+    
+    Each <ENTITY>_stock_data.csv file in DATA_DIR is one entity. The
+    listing is cached until a file is added to or removed from DATA_DIR.
+    
+    Returns:
+        Dict of entity name -> CSV path
+    """
+    return dict(_entity_files())
+
+
 def get_available_entities() -> List[str]:
     """
     Get list of available entities (stocks) that can be forecasted.
-    For now, only AAPL is available from the dataset.
     
     Returns:
         List of entity names
     """
-    return ["AAPL"]
+    return list(get_entity_files())
+
+
+def get_entity_path(entity: str) -> str:
+    """
+    Get the data file for an entity.
+    
+    Args:
+        entity: Entity name (case-insensitive)
+    
+    Returns:
+        Path to the entity's CSV file
+    
+    Raises:
+        ValueError: If the entity is not available
+    """
+    # Only names listed in DATA_DIR resolve: the entity comes from users and
+    # the LLM, so it is never joined into a path ("../x", "/etc/x")
+    files = _entity_files()
+    if entity in files:
+        return files[entity]
+    for name, path in files.items():
+        if name.upper() == entity.upper():
+            return path
+    raise ValueError(f"Entity '{entity}' not found. Available: {list(files)}")
 
 
 def get_available_metrics() -> List[str]:
@@ -87,19 +152,10 @@ def prepare_data_for_forecast(
         DataFrame ready for ForecastingPipeline (ds, y, and optional regressors)
     """
     # Load the raw data
-    df = load_stock_data()
-    
-    # Map metric names to columns
-    metric_column_map = {
-        "close_price": "y",  # Already named correctly
-        "volume": "Volume",
-        "high": "High",
-        "low": "Low",
-        "open": "Open"
-    }
+    df = load_stock_data(get_entity_path(entity))
     
     # Get the target column
-    target_col = metric_column_map.get(metric, "y")
+    target_col = METRIC_COLUMNS.get(metric, "y")
     
     # Build output dataframe
     result = pd.DataFrame({
@@ -32,6 +32,7 @@ class ForecastingPipeline:
         self.model = None
         self.request = None
         self.historical_df = None
+        self.preprocessed_df = None
 
     def run_forecast(
         self, 
@@ -60,6 +61,7 @@ class ForecastingPipeline:
 
         # Step 3: Preprocess data
         preprocessed_df = self._preprocess_data()
+        self.preprocessed_df = preprocessed_df
 
         # Step 4: Initialize and train model
         self._train_model(preprocessed_df)
@@ -75,6 +77,33 @@ class ForecastingPipeline:
 
         return result
 
+    def reforecast(self, horizon_periods: int, horizon_unit: str = "days") -> Dict[str, Any]:
+        """
+        Predict a different horizon with the already fitted model.
+
+        Prophet's fit does not depend on the horizon, so follow-ups that
+        only change it skip training (steps 2-4) entirely.
+
+        Args:
+            horizon_periods: Number of periods to forecast
+            horizon_unit: Unit of periods ("days", "weeks", "months")
+
+        Returns:
+            Structured forecast result JSON
+        """
+        if self.model is None:
+            raise ValueError("reforecast() requires a prior run_forecast()")
+
+        self.request = {
+            **self.request,
+            "forecast_horizon": {"periods": horizon_periods, "unit": horizon_unit}
+        }
+        self._validate_request()
+
+        forecast_df = self._generate_forecast(self.preprocessed_df)
+        metrics = self._compute_metrics(forecast_df)
+        return self._build_output(forecast_df, metrics)
+
     def _validate_request(self):
         """STEP 1 - Request Validation (Fail Fast)"""
         req = self.request
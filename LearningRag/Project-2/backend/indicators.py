@@ -0,0 +1,327 @@
+"""
+Indicator Store
+
+Windowed technical indicators per entity (SMA, EMA, rolling volatility,
+returns), computed incrementally and cached as compact arrays.
+
+- Indicators are named "<kind>_<window>" on the close price, or
+  "<metric>_<kind>_<window>" on another metric (e.g. "volume_sma_20")
+- When an entity's data file grows, only the new rows are computed: each
+  indicator needs at most `window` rows of history (EMA only its last value)
+- Each entity holds one float32 matrix (rows x indicators), grown
+  geometrically so appends are amortized O(1) per row
+- Indicators not in the default set are added as columns on first request
+
+The same values serve the analytics route and, by name, as Prophet
+regressors (see add_indicator_regressors).
+
+Environment:
+- INDICATORS: comma-separated default indicator set
+  (default "sma_20,sma_50,ema_12,ema_26,volatility_20,return_1,return_5")
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_loader import METRIC_COLUMNS, get_entity_path, load_stock_data
+
+
+DEFAULT_INDICATORS = [
+    name.strip()
+    for name in os.environ.get(
+        "INDICATORS", "sma_20,sma_50,ema_12,ema_26,volatility_20,return_1,return_5"
+    ).split(",")
+    if name.strip()
+]
+
+KINDS = ("sma", "ema", "volatility", "return")
+
+_METRICS = list(METRIC_COLUMNS)
+_NAME_RE = re.compile(
+    rf"^(?:({'|'.join(_METRICS)})_)?({'|'.join(KINDS)})_(\d+)$"
+)
+
+
+class IndicatorSpec(NamedTuple):
+    name: str
+    metric: str
+    kind: str
+    window: int
+
+
+def indicator_name(metric: str, kind: str, window: int) -> str:
+    """Canonical name of an indicator ("sma_20", "volume_ema_12", ...)."""
+    return f"{kind}_{window}" if metric == "close_price" else f"{metric}_{kind}_{window}"
+
+
+def parse_indicator(name: str) -> IndicatorSpec:
+    """
+    Parse an indicator name.
+
+    Args:
+        name: e.g. "sma_20", "ema_12", "volatility_20", "return_5", "volume_sma_20"
+
+    Returns:
+        IndicatorSpec
+
+    Raises:
+        ValueError: If the name is not a valid indicator
+    """
+    match = _NAME_RE.match(name.strip().lower())
+    if not match or int(match.group(3)) < 1:
+        raise ValueError(
+            f"Unknown indicator '{name}'. Expected [<metric>_]<{'|'.join(KINDS)}>_<window>"
+        )
+    metric, kind, window = match.group(1) or "close_price", match.group(2), int(match.group(3))
+    return IndicatorSpec(indicator_name(metric, kind, window), metric, kind, window)
+
+
+def is_indicator(name: str) -> bool:
+    return _NAME_RE.match(name.strip().lower()) is not None
+
+
+def compute_indicator(
+    spec: IndicatorSpec,
+    values: np.ndarray,
+    start: int = 0,
+    previous: Optional[float] = None
+) -> np.ndarray:
+    """
+    Indicator values for rows [start, len(values)) of a series.
+
+    Only the last `window` rows before `start` are read; EMA instead
+    continues from `previous` (its value at row start - 1).
+
+    Args:
+        spec: Indicator to compute
+        values: Full raw series
+        start: First row to compute
+        previous: EMA value at row start - 1
+
+    Returns:
+        Array of len(values) - start values (NaN until the window is full)
+    """
+    window = spec.window
+
+    if spec.kind == "ema":
+        tail = values[start:]
+        if previous is not None and not np.isnan(previous):
+            # ewm(adjust=False) starts from its first input, so seed it with the previous EMA
+            seeded = np.concatenate([[previous], tail])
+            return pd.Series(seeded).ewm(span=window, adjust=False).mean().to_numpy()[1:]
+        return pd.Series(tail).ewm(span=window, adjust=False).mean().to_numpy()
+
+    lo = max(0, start - window)
+    series = pd.Series(values[lo:])
+    if spec.kind == "sma":
+        out = series.rolling(window).mean()
+    elif spec.kind == "return":
+        out = series.pct_change(window)
+    else:
+        # Daily std of log returns over the window
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = np.log(series).diff().rolling(window).std()
+    return out.to_numpy()[start - lo:]
+
+
+# ============================================================================
+# Per-entity array store
+# ============================================================================
+
+class EntityIndicators:
+    """
+    Raw metric rows plus indicator columns for one entity.
+
+    Readers take the same lock as add() and append(), so they never see the
+    row count and arrays of two different versions.
+    """
+
+    def __init__(self, specs: Iterable[IndicatorSpec]):
+        self._lock = threading.RLock()
+        self.specs: List[IndicatorSpec] = []
+        self.columns: Dict[str, int] = {}
+        self.n = 0
+        self._dates = np.empty(0, dtype="datetime64[ns]")
+        self._raw = np.empty((0, len(_METRICS)), dtype=np.float64)
+        self._data = np.empty((0, 0), dtype=np.float32)
+        self.mtime: Optional[float] = None
+        self.add(specs)
+
+    @property
+    def dates(self) -> np.ndarray:
+        with self._lock:
+            return self._dates[:self.n]
+
+    def raw(self, metric: str) -> np.ndarray:
+        with self._lock:
+            return self._raw[:self.n, _METRICS.index(metric)]
+
+    def _reserve(self, rows: int):
+        capacity = len(self._dates)
+        if rows <= capacity:
+            return
+        capacity = max(rows, 2 * capacity, 64)
+        dates = np.empty(capacity, dtype="datetime64[ns]")
+        raw = np.empty((capacity, self._raw.shape[1]), dtype=np.float64)
+        data = np.full((capacity, self._data.shape[1]), np.nan, dtype=np.float32)
+        dates[:self.n], raw[:self.n], data[:self.n] = self.dates, self._raw[:self.n], self._data[:self.n]
+        self._dates, self._raw, self._data = dates, raw, data
+
+    def add(self, specs: Iterable[IndicatorSpec]):
+        """Add indicator columns, computed over the full history."""
+        with self._lock:
+            new = [s for s in dict.fromkeys(specs) if s.name not in self.columns]
+            if not new:
+                return
+            data = np.full((len(self._dates), len(self.specs) + len(new)), np.nan, dtype=np.float32)
+            data[:, :len(self.specs)] = self._data
+            for spec in new:
+                self.columns[spec.name] = len(self.specs)
+                self.specs.append(spec)
+                if self.n:
+                    data[:self.n, self.columns[spec.name]] = compute_indicator(spec, self.raw(spec.metric))
+            self._data = data
+
+    def append(self, df: pd.DataFrame):
+        """
+        Append rows (from load_stock_data) and compute only their indicators.
+
+        Args:
+            df: New rows, dated after the last stored row
+        """
+        k = len(df)
+        if k == 0:
+            return
+        with self._lock:
+            start = self.n
+            self._reserve(start + k)
+            self._dates[start:start + k] = df["ds"].to_numpy()
+            self._raw[start:start + k] = df[[METRIC_COLUMNS[m] for m in _METRICS]].to_numpy(np.float64)
+            self.n = start + k
+
+            for spec in self.specs:
+                col = self.columns[spec.name]
+                previous = float(self._data[start - 1, col]) if start else None
+                self._data[start:self.n, col] = compute_indicator(spec, self.raw(spec.metric), start, previous)
+
+    def locate(self, start: pd.Timestamp, end: pd.Timestamp) -> Tuple[int, int]:
+        """Row range [i, j) dated within [start, end]."""
+        dates = self.dates
+        i = int(np.searchsorted(dates, np.datetime64(start, "ns"), side="left"))
+        j = int(np.searchsorted(dates, np.datetime64(end, "ns"), side="right"))
+        return i, j
+
+    def column(self, name: str) -> np.ndarray:
+        with self._lock:
+            return self._data[:self.n, self.columns[name]]
+
+    def frame(self, names: List[str]) -> pd.DataFrame:
+        """DataFrame with ds plus the named indicator columns."""
+        with self._lock:
+            result = pd.DataFrame({"ds": self.dates})
+            for name in names:
+                result[name] = self.column(name)
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return self._dates.nbytes + self._raw.nbytes + self._data.nbytes
+
+
+class IndicatorStore:
+    """Thread-safe cache of EntityIndicators, kept in sync with the data files."""
+
+    def __init__(self, defaults: Iterable[str] = DEFAULT_INDICATORS):
+        self.defaults = [parse_indicator(name) for name in defaults]
+        self._entities: Dict[str, EntityIndicators] = {}
+        self._lock = threading.Lock()
+        self.rows_appended = 0
+        self.rebuilds = 0
+
+    def get(self, entity: str, names: Optional[Iterable[str]] = None) -> EntityIndicators:
+        """
+        Get an entity's indicators, updated to its current data file.
+
+        Args:
+            entity: Entity name
+            names: Indicators needed besides the defaults
+
+        Returns:
+            EntityIndicators (rows appended incrementally if the file grew)
+
+        Raises:
+            ValueError: Unknown entity or indicator name
+        """
+        specs = [parse_indicator(name) for name in names or []]
+        path = get_entity_path(entity)
+        mtime = os.path.getmtime(path)
+
+        with self._lock:
+            key = entity.upper()
+            entry = self._entities.get(key)
+            if entry is None or entry.mtime != mtime:
+                entry = self._sync(entry, load_stock_data(path))
+                entry.mtime = mtime
+                self._entities[key] = entry
+            entry.add(specs)
+            return entry
+
+    def _sync(self, entry: Optional[EntityIndicators], df: pd.DataFrame) -> EntityIndicators:
+        # Append when the stored rows are an unchanged prefix of the file, else rebuild
+        if entry is not None and entry.n <= len(df):
+            head = df.iloc[:entry.n]
+            if (
+                np.array_equal(entry.dates, head["ds"].to_numpy())
+                and np.array_equal(entry._raw[:entry.n], head[[METRIC_COLUMNS[m] for m in _METRICS]].to_numpy(np.float64))
+            ):
+                self.rows_appended += len(df) - entry.n
+                entry.append(df.iloc[entry.n:])
+                return entry
+
+        self.rebuilds += 1
+        rebuilt = EntityIndicators(self.defaults + (entry.specs if entry else []))
+        rebuilt.append(df)
+        return rebuilt
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entities": len(self._entities),
+                "bytes": sum(e.nbytes for e in self._entities.values()),
+                "rows_appended": self.rows_appended,
+                "rebuilds": self.rebuilds
+            }
+
+
+indicator_store = IndicatorStore()
+
+
+def add_indicator_regressors(df: pd.DataFrame, entity: str, regressors: Optional[List[str]]) -> pd.DataFrame:
+    """
+    Attach indicator regressors to forecasting data.
+
+    Regressor names that are indicators ("sma_20", "volatility_20", ...) are
+    joined from the store on ds; warm-up rows where a window is not yet
+    full are dropped, since Prophet rejects NaN regressors.
+
+    Args:
+        df: Output of prepare_data_for_forecast (ds, y, ...)
+        entity: Entity name
+        regressors: Requested regressor names (non-indicators are ignored)
+
+    Returns:
+        DataFrame ready for ForecastingPipeline
+    """
+    names = [r for r in regressors or [] if is_indicator(r)]
+    if not names:
+        return df
+
+    entry = indicator_store.get(entity, names)
+    frame = entry.frame([parse_indicator(n).name for n in names])
+    frame.columns = ["ds"] + names
+    return df.merge(frame, on="ds", how="left").dropna().reset_index(drop=True)
@@ -0,0 +1,37 @@
+"""
+LLM Client Pool
+
+Shared, lazily created chat model clients for the router and the response
+composer (the LLMPool implementation lives in LearningRag/shared/llm_pool.py).
+
+Environment:
+- LLM_BACKEND: "huggingface" (default) or "stub" for tests/offline runs
+- HUGGINGFACE_API_TOKEN: Hugging Face token for both the router and the
+  composer (unset: huggingface_hub's own token lookup)
+- LLM_MAX_CONCURRENCY: max in-flight LLM calls per process (default 4)
+- LLM_TIMEOUT: per-request timeout in seconds (default 60)
+- LLM_QUEUE_TIMEOUT: max seconds to wait for a free slot (default 30)
+- LLM_STUB_RESPONSE: canned reply returned by the stub backend
+"""
+
+import os
+
+import shared_path  # noqa: F401  (makes `shared` importable)
+from shared.llm_pool import DEFAULT_REPO_ID, LLMPool
+
+
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "huggingface")
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "60"))
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", "30"))
+LLM_STUB_RESPONSE = os.environ.get("LLM_STUB_RESPONSE", "This is a stub response.")
+
+pool = LLMPool(
+    backend=LLM_BACKEND,
+    repo_id=DEFAULT_REPO_ID,
+    api_token=os.environ.get("HUGGINGFACE_API_TOKEN") or None,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    timeout=LLM_TIMEOUT,
+    queue_timeout=LLM_QUEUE_TIMEOUT,
+    stub_response=LLM_STUB_RESPONSE
+)
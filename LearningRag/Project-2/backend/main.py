@@ -6,35 +6,60 @@ It integrates:
 - Router LLM for intent classification
 - Forecasting Pipeline for predictions
 - Response Composer for AI summaries
+- Conversation sessions for follow-up questions
 """
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
+import json
 import re
-from typing import Optional
+import threading
+from typing import Any, Iterator, Optional
 
 from router_llm import route_question
 from schema import (
+    AnalyticsIntent,
     ForecastRequest, 
     ForecastingIntent,
     QueryRequest,
     QueryResponse,
+    RouterOutput,
     ConversationState
 )
 from forecasting_pipeline import ForecastingPipeline, build_forecast_request
 from data_loader import prepare_data_for_forecast, get_available_entities
-from response_composer import compose_response, format_full_response
+from response_composer import compose_response, format_full_response, stream_response
+from conversation import Session, resolve_follow_up, session_store
+from singleflight import coalesced
+from analytics_engine import analytics_engine, is_ranking
+from ranking import ranking_engine
+from indicators import DEFAULT_INDICATORS, add_indicator_regressors, indicator_store
 
 
 class Question(BaseModel):
     question: str
+    session_id: Optional[str] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the ranking matrix in the background (reads every data file);
+    # the first ranking query waits for it instead of building it itself
+    threading.Thread(
+        target=ranking_engine.refresh, kwargs={"force": True},
+        name="ranking-warm-up", daemon=True
+    ).start()
+    yield
 
 
 app = FastAPI(
     title="Analytics & Forecasting Copilot",
     description="AI-powered analytics and forecasting API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -81,16 +106,56 @@ def parse_horizon(horizon_str: str) -> tuple[int, str]:
     return 30, "days"
 
 
-def execute_forecast(intent: ForecastingIntent) -> dict:
+def run_analytics(intent: AnalyticsIntent) -> dict:
     """
-    Execute forecasting pipeline based on intent.
+    Answer an analytics intent: cross-entity rankings from the ranking
+    engine, everything else from the analytics engine.
+    """
+    if is_ranking(intent):
+        return ranking_engine.rank(intent)
+    return analytics_engine.run(intent)
+
+
+def _fit_key(intent: ForecastingIntent) -> tuple:
+    """Everything the Prophet fit depends on (the horizon is not part of it)."""
+    return (
+        intent.entity.upper(),
+        intent.metric,
+        intent.granularity,
+        tuple(intent.regressors or []),
+        tuple(sorted((intent.seasonality or {}).items()))
+    )
+
+
+def run_forecast_pipeline(intent: ForecastingIntent, session: Optional[Session] = None) -> dict:
+    """
+    Run the forecasting pipeline for an intent, without summarization.
+    
+    With a session, the fitted pipeline is kept on it; a later intent that
+    differs only in horizon re-predicts from that fit instead of refitting.
     
     Args:
         intent: ForecastingIntent from Router LLM
+        session: Optional conversation session
     
     Returns:
-        Formatted forecast result with summary
+        Raw ForecastingPipeline output (forecast, metrics, metadata)
     """
+    if session is None:
+        return _fit_and_forecast(intent)[1]
+    
+    fit_key = _fit_key(intent)
+    with session.lock:
+        if session.pipeline is not None and session.fit_key == fit_key:
+            periods, unit = parse_horizon(intent.horizon)
+            return session.pipeline.reforecast(periods, unit)
+        
+        pipeline, result = _fit_and_forecast(intent)
+        session.pipeline, session.fit_key = pipeline, fit_key
+        return result
+
+
+def _fit_and_forecast(intent: ForecastingIntent) -> tuple[ForecastingPipeline, dict]:
     # Parse horizon
     periods, unit = parse_horizon(intent.horizon)
     
@@ -108,6 +173,8 @@ def execute_forecast(intent: ForecastingIntent) -> dict:
         metric=intent.metric,
         include_regressors=regressors
     )
+    # Indicator regressors ("sma_20", "volatility_20", ...) from the indicator store
+    historical_data = add_indicator_regressors(historical_data, intent.entity, regressors)
     
     # Build forecast request
     regressor_configs = [{"name": r, "normalize": True} for r in regressors]
@@ -123,7 +190,33 @@ def execute_forecast(intent: ForecastingIntent) -> dict:
     
     # Execute pipeline
     pipeline = ForecastingPipeline()
-    result = pipeline.run_forecast(forecast_request, historical_data)
+    return pipeline, pipeline.run_forecast(forecast_request, historical_data)
+
+
+def _forecast_key(intent: ForecastingIntent, session: Optional[Session] = None):
+    # A session must store its own fitted pipeline, which a follower of
+    # another caller's run would never get: don't coalesce those calls
+    if session is not None:
+        return None
+    return ("forecast", _fit_key(intent), parse_horizon(intent.horizon))
+
+
+@coalesced(_forecast_key)
+def execute_forecast(intent: ForecastingIntent, session: Optional[Session] = None) -> dict:
+    """
+    Execute forecasting pipeline based on intent.
+    
+    Identical session-less forecasts requested concurrently (e.g. several
+    dashboard widgets) share one pipeline run.
+    
+    Args:
+        intent: ForecastingIntent from Router LLM
+        session: Optional conversation session (reuses its fitted model)
+    
+    Returns:
+        Formatted forecast result with summary
+    """
+    result = run_forecast_pipeline(intent, session)
     
     # Generate summary (using fallback since LLM may not be configured)
     summary = compose_response(result, use_llm=False)
@@ -152,16 +245,66 @@ def list_entities():
     return {"entities": get_available_entities()}
 
 
+@app.get("/indicators")
+def list_indicators():
+    """Default indicators (usable as analytics operations and forecast regressors)."""
+    return {"indicators": DEFAULT_INDICATORS, "store": indicator_store.stats()}
+
+
+@app.get("/rankings")
+def rankings(
+    measure: str = "return",
+    metric: str = "close_price",
+    time_range: str = "last 30 days",
+    k: int = 10,
+    ascending: bool = False
+):
+    """
+    Top-k entities by a statistic, e.g. /rankings?measure=return&time_range=last 30 days.
+    Uses query parameters instead of JSON body.
+    """
+    try:
+        # Structured parameters: nothing here is re-parsed from text
+        return ranking_engine.rank(
+            AnalyticsIntent(entity=None, metric=metric, time_range=time_range, operation="rank"),
+            measure=measure,
+            descending=not ascending,
+            k=max(1, k)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/route")
 def route(q: Question):
     """
     Route a natural language question to the appropriate pipeline.
     Returns structured intent without executing the pipeline.
+    
+    With a known session_id, the question is routed as a follow-up of that
+    session and the result becomes its latest intent.
     """
-    result = route_question(q.question)
+    session = session_store.get(q.session_id)
+    if session is None:
+        return route_question(q.question)
+    
+    result = _route(q.question, session)
+    session.remember(result)
     return result
 
 
+@app.post("/analytics")
+def analytics(intent: AnalyticsIntent):
+    """
+    Run a historical analytics query directly (no router, no LLM).
+    Bypasses the router for direct API access.
+    """
+    try:
+        return run_analytics(intent)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/forecast")
 def forecast(request: ForecastRequest):
     """
@@ -185,54 +328,139 @@ def forecast(request: ForecastRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _route(question: str, session: Session) -> RouterOutput:
+    """
+    Route a question in the context of a session.
+    
+    Field-only follow-ups ("what about 90 days?") are resolved from the
+    previous intent without an LLM call; anything else goes to the Router
+    LLM together with the session's ConversationState.
+    """
+    follow_up = resolve_follow_up(question, session.state.last_intent)
+    if follow_up is not None:
+        return follow_up
+    return route_question(question, session.state)
+
+
+def handle_routed_query(router_output: RouterOutput, session: Optional[Session] = None) -> QueryResponse:
+    """
+    Execute the pipeline selected by the router.
+    
+    Args:
+        router_output: Parsed Router LLM output
+        session: Optional conversation session
+    
+    Returns:
+        QueryResponse for the selected route
+    """
+    response = QueryResponse(
+        route=router_output.route,
+        needs_clarification=router_output.needs_clarification
+    )
+    
+    if router_output.route == "clarification":
+        response.clarification_message = (
+            "I need more information to help you. "
+            "Could you please specify the entity, metric, and time period?"
+        )
+        return response
+    
+    if router_output.route == "forecast" and router_output.forecast_intent:
+        # Execute forecast
+        forecast_result = execute_forecast(router_output.forecast_intent, session)
+        response.forecast = forecast_result
+        response.summary = forecast_result.get("summary")
+        return response
+    
+    if router_output.route in ("analytics", "both") and router_output.analytics_intent:
+        try:
+            analytics_result = run_analytics(router_output.analytics_intent)
+        except ValueError as e:
+            # Unknown entity or unusable time range: ask instead of failing
+            response.needs_clarification = True
+            response.clarification_message = str(e)
+            return response
+        response.analytics = analytics_result
+        response.summary = analytics_result["summary"]
+        return response
+    
+    if router_output.route == "rag":
+        # RAG pipeline not yet implemented
+        response.rag = {"message": "RAG pipeline coming soon"}
+        response.summary = "Document search pipeline is under development."
+        return response
+    
+    return response
+
+
 @app.post("/query")
 def query(request: QueryRequest):
     """
     Full end-to-end query handler.
     Routes the question and executes the appropriate pipeline.
+    
+    Pass the returned session_id back to ask follow-up questions.
     """
     try:
-        # Step 1: Route the question
-        router_output = route_question(request.question)
-        
-        # Step 2: Handle based on route
-        response = QueryResponse(
-            route=router_output.route,
-            needs_clarification=router_output.needs_clarification
-        )
+        session = session_store.get_or_create(request.session_id)
         
-        if router_output.route == "clarification":
-            response.clarification_message = (
-                "I need more information to help you. "
-                "Could you please specify the entity, metric, and time period?"
-            )
-            return response
-        
-        if router_output.route == "forecast" and router_output.forecast_intent:
-            # Execute forecast
-            forecast_result = execute_forecast(router_output.forecast_intent)
-            response.forecast = forecast_result
-            response.summary = forecast_result.get("summary")
-            return response
-        
-        if router_output.route == "analytics":
-            # Analytics pipeline not yet implemented
-            response.analytics = {"message": "Analytics pipeline coming soon"}
-            response.summary = "Analytics pipeline is under development."
-            return response
-        
-        if router_output.route == "rag":
-            # RAG pipeline not yet implemented
-            response.rag = {"message": "RAG pipeline coming soon"}
-            response.summary = "Document search pipeline is under development."
-            return response
+        # Step 1: Route the question (follow-ups inherit the session's intent)
+        router_output = _route(request.question, session)
         
+        # Step 2: Handle based on route
+        response = handle_routed_query(router_output, session)
+        session.remember(router_output)
+        response.session_id = session.id
         return response
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(event: str, data: Any) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/query/stream")
+def query_stream(request: QueryRequest):
+    """
+    Streaming variant of /query (server-sent events).
+    
+    Events: "route" as soon as the question is routed; for forecasts,
+    "forecast" with the numbers, then "summary" fragments as the LLM
+    writes them; for other routes, a single "result"; finally "done".
+    """
+    def events() -> Iterator[str]:
+        try:
+            session = session_store.get_or_create(request.session_id)
+            router_output = _route(request.question, session)
+            yield _sse("route", {
+                "route": router_output.route,
+                "needs_clarification": router_output.needs_clarification,
+                "session_id": session.id
+            })
+            
+            if router_output.route == "forecast" and router_output.forecast_intent:
+                result = run_forecast_pipeline(router_output.forecast_intent, session)
+                yield _sse("forecast", format_full_response(result, None))
+                for token in stream_response(result):
+                    yield _sse("summary", token)
+            else:
+                result = handle_routed_query(router_output, session)
+                result.session_id = session.id
+                yield _sse("result", result.model_dump())
+            session.remember(router_output)
+            
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            yield _sse("error", {"detail": detail})
+        
+        yield _sse("done", None)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.post("/forecast/simple")
 def forecast_simple(
     entity: str = "AAPL",
@@ -0,0 +1,390 @@
+"""
+Ranking Engine
+
+Cross-entity rankings ("top 10 tickers by 30-day return") from a matrix of
+per-entity summary statistics.
+
+- One row per entity and one column per (metric, range, measure), in a
+  single contiguous float64 matrix. Ranges are the common relative ones
+  (RANKING_RANGES), each evaluated up to the entity's own last date
+- A top-k query reads one column and selects with np.argpartition:
+  O(entities + k log k), no per-entity work
+- The matrix follows the data directory: new files add a row, changed files
+  recompute only their row, removed files are swapped out
+- Rows are computed outside the lock queries take and swapped in at the
+  end; the API warms the matrix at startup
+- Any other range ("2024", "Q1 2025", explicit dates) falls back to
+  computing every entity with the AnalyticsEngine
+
+Environment:
+- RANKING_RANGES: comma-separated precomputed ranges (default
+  "last week,last 30 days,last month,last 3 months,last 6 months,last year,ytd,all time")
+- RANKING_REFRESH_INTERVAL: min seconds between data directory scans (default 5)
+"""
+
+import functools
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analytics_engine import (
+    TRADING_DAYS_PER_YEAR,
+    SeriesIndex,
+    analytics_engine,
+    normalize_metric,
+    normalize_operation,
+    parse_time_range,
+    summarize
+)
+from data_loader import METRIC_COLUMNS, get_entity_files, load_stock_data
+from schema import AnalyticsIntent
+
+
+RANKING_RANGES = [
+    text.strip()
+    for text in os.environ.get(
+        "RANKING_RANGES",
+        "last week,last 30 days,last month,last 3 months,last 6 months,last year,ytd,all time"
+    ).split(",")
+    if text.strip()
+]
+RANKING_REFRESH_INTERVAL = float(os.environ.get("RANKING_REFRESH_INTERVAL", "5"))
+
+DEFAULT_TOP_K = 10
+
+MEASURES = ("latest", "average", "sum", "max", "min", "return", "volatility")
+
+# Range texts are matched by the dates they resolve to on these reference
+# histories, so "past month", "last 1 month" and "last month" share a column
+_REFERENCE_HISTORIES = [
+    (pd.Timestamp("2000-01-03"), pd.Timestamp("2020-02-28")),
+    (pd.Timestamp("2000-01-03"), pd.Timestamp("2023-07-17")),
+]
+
+
+@functools.lru_cache(maxsize=256)
+def range_signature(text: Optional[str]) -> Optional[tuple]:
+    """Dates `text` resolves to on the reference histories (None if unparseable)."""
+    try:
+        return tuple(parse_time_range(text, first, last) for first, last in _REFERENCE_HISTORIES)
+    except ValueError:
+        return None
+
+
+def range_stats(index: SeriesIndex, bounds: List[Tuple[int, int]]) -> np.ndarray:
+    """
+    Summary statistics of one series for each range.
+
+    Args:
+        index: SeriesIndex of the entity's metric
+        bounds: Row range [i, j) of each range
+
+    Returns:
+        Flat array of len(bounds) * len(MEASURES) values (NaN where empty)
+    """
+    out = np.full(len(bounds) * len(MEASURES), np.nan)
+
+    for r, (i, j) in enumerate(bounds):
+        if j <= i:
+            continue
+        daily = index.volatility(i, j)
+        period_return = index.period_return(i, j)
+        out[r * len(MEASURES):(r + 1) * len(MEASURES)] = [
+            index.values[j - 1],
+            index.mean(i, j),
+            index.total(i, j),
+            index.values[index.argmax(i, j)],
+            index.values[index.argmin(i, j)],
+            period_return if period_return is not None else np.nan,
+            daily * math.sqrt(TRADING_DAYS_PER_YEAR) if daily is not None else np.nan
+        ]
+    return out
+
+
+def parse_top_k(text: Optional[str], default: int = DEFAULT_TOP_K) -> int:
+    # Not "first"/"last": "over the last 30 days" is a range, not k
+    match = re.search(r"\b(?:top|bottom|best|worst)\s+(\d+)", (text or "").lower())
+    return max(1, int(match.group(1))) if match else default
+
+
+# Order words; "bottom" and "lowest" also match the min pattern, so they
+# are removed before the measure is looked up
+_DIRECTION_RE = r"\b(?:top|best|most|highest|bottom|worst|least|lowest)\b"
+_ASCENDING_RE = r"\b(?:bottom|worst|least|lowest)\b"
+
+
+def parse_measure(text: Optional[str]) -> Optional[str]:
+    """
+    Ranking measure named in free text ("lowest average close" -> average).
+
+    Returns:
+        One of MEASURES, or None if the text names none
+    """
+    text = (text or "").lower()
+    measure = normalize_operation(re.sub(_DIRECTION_RE, " ", text), exclude=("rank",))
+    if measure is None and re.search(r"\b(?:highest|lowest)\b", text):
+        # Nothing else named: "highest close" is about the extreme value
+        measure = "min" if "lowest" in text else "max"
+    return measure if measure in MEASURES else None
+
+
+def parse_descending(text: Optional[str]) -> bool:
+    """Whether free text asks for the highest values first (the default)."""
+    return not re.search(_ASCENDING_RE, (text or "").lower())
+
+
+# ============================================================================
+# Engine
+# ============================================================================
+
+class RankingEngine:
+    """Per-entity statistics matrix with incremental updates and top-k queries."""
+
+    def __init__(self, ranges: List[str] = RANKING_RANGES, refresh_interval: float = RANKING_REFRESH_INTERVAL):
+        self.ranges = list(ranges)
+        self.metrics = list(METRIC_COLUMNS)
+        self.refresh_interval = refresh_interval
+        self._signatures = {range_signature(text): r for r, text in enumerate(self.ranges)}
+        if None in self._signatures:
+            raise ValueError(f"Invalid RANKING_RANGES: {self.ranges}")
+
+        self.width = len(self.metrics) * len(self.ranges) * len(MEASURES)
+        self.entities: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._matrix = np.empty((0, self.width), dtype=np.float64)
+        self._last_refresh = float("-inf")
+        self._lock = threading.Lock()          # guards the matrix and its indexes
+        self._refresh_lock = threading.Lock()  # one scan at a time
+        self._built = False
+        self.rows_computed = 0
+
+    def column(self, metric: str, range_index: int, measure: str) -> int:
+        return (
+            (self.metrics.index(metric) * len(self.ranges) + range_index) * len(MEASURES)
+            + MEASURES.index(measure)
+        )
+
+    # ----- incremental updates -----
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Sync the matrix with the data directory.
+
+        Scans at most once per refresh_interval unless forced; only new or
+        modified files are loaded. Rows are computed without holding the
+        matrix lock (queries keep using the current rows) and swapped in at
+        the end. Once the matrix has been built, a query that finds another
+        scan running doesn't wait for it.
+
+        Returns:
+            Number of entity rows (re)computed
+        """
+        with self._lock:
+            if self._is_fresh(force):
+                return 0
+
+        if not self._refresh_lock.acquire(blocking=force or not self._built):
+            return 0
+        try:
+            with self._lock:
+                if self._is_fresh(force):
+                    return 0  # refreshed while we waited
+                self._last_refresh = time.monotonic()
+                mtimes = dict(self._mtimes)
+
+            files = get_entity_files()
+            rows, failed = {}, set()
+            for entity, path in files.items():
+                mtime = os.path.getmtime(path)
+                if mtimes.get(entity) == mtime:
+                    continue
+                try:
+                    rows[entity] = (self._entity_row(path), mtime)
+                except Exception as e:
+                    print(f"Warning: skipping {entity} in rankings: {e}")
+                    failed.add(entity)
+
+            with self._lock:
+                for entity in [e for e in self._rows if e not in files or e in failed]:
+                    self._remove(entity)
+                for entity, (row, mtime) in rows.items():
+                    self._set_row(entity, row)
+                    self._mtimes[entity] = mtime
+                self.rows_computed += len(rows)
+                self._built = True
+            return len(rows)
+        finally:
+            self._refresh_lock.release()
+
+    def _is_fresh(self, force: bool) -> bool:
+        # Called with the lock held; until the first build completes,
+        # callers always go on to wait for (or run) it
+        return (
+            self._built and not force
+            and time.monotonic() - self._last_refresh < self.refresh_interval
+        )
+
+    def _entity_row(self, path: str) -> np.ndarray:
+        df = load_stock_data(path)
+        if df.empty:
+            raise ValueError("no rows")
+        dates = df["ds"].to_numpy()
+        indexes = [SeriesIndex(dates, df[METRIC_COLUMNS[metric]].to_numpy()) for metric in self.metrics]
+
+        # All metrics share the dates, so resolve each range once
+        first, last = pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])
+        bounds = [indexes[0].locate(*parse_time_range(text, first, last)) for text in self.ranges]
+        return np.concatenate([range_stats(index, bounds) for index in indexes])
+
+    def _set_row(self, entity: str, row: np.ndarray):
+        if entity not in self._rows:
+            n = len(self.entities)
+            if n == len(self._matrix):
+                grown = np.empty((max(64, 2 * n), self.width), dtype=np.float64)
+                grown[:n] = self._matrix[:n]
+                self._matrix = grown
+            self._rows[entity] = n
+            self.entities.append(entity)
+        self._matrix[self._rows[entity]] = row
+
+    def _remove(self, entity: str):
+        # Swap the last row into the freed slot to keep the matrix dense
+        row, last = self._rows.pop(entity), len(self.entities) - 1
+        if row != last:
+            moved = self.entities[last]
+            self._matrix[row] = self._matrix[last]
+            self.entities[row] = moved
+            self._rows[moved] = row
+        self.entities.pop()
+        self._mtimes.pop(entity, None)
+
+    # ----- queries -----
+
+    def top_k(
+        self,
+        metric: str,
+        range_index: int,
+        measure: str,
+        k: int = DEFAULT_TOP_K,
+        descending: bool = True
+    ) -> List[Tuple[str, float]]:
+        """
+        Best k entities for one precomputed statistic.
+
+        Args:
+            metric: METRIC_COLUMNS key
+            range_index: Index into self.ranges
+            measure: One of MEASURES
+            k: Number of entities
+            descending: Highest first (False: lowest first)
+
+        Returns:
+            [(entity, value)] in rank order; entities without data are left out
+        """
+        with self._lock:
+            n = len(self.entities)
+            values = self._matrix[:n, self.column(metric, range_index, measure)]
+            keys = -values if descending else values.copy()
+            keys[np.isnan(keys)] = np.inf
+
+            k = min(k, n)
+            if k <= 0:
+                return []
+            candidates = np.argpartition(keys, k - 1)[:k] if k < n else np.arange(n)
+            order = candidates[np.argsort(keys[candidates], kind="stable")]
+            return [(self.entities[i], float(values[i])) for i in order if np.isfinite(keys[i])]
+
+    def rank(
+        self,
+        intent: AnalyticsIntent,
+        measure: Optional[str] = None,
+        descending: Optional[bool] = None,
+        k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Rank entities for an AnalyticsIntent.
+
+        Args:
+            intent: Intent with a ranking operation (e.g. "top 10 by return")
+            measure: One of MEASURES (default: parsed from the intent)
+            descending: Highest first (default: parsed from the operation)
+            k: Number of entities (default: parsed from the operation)
+
+        Returns:
+            Result dict with "rankings" and a template "summary"
+
+        Raises:
+            ValueError: If the measure or time range is not supported
+        """
+        metric = normalize_metric(intent.metric)
+        operation = intent.operation or ""
+        if measure is None:
+            measure = parse_measure(operation) or parse_measure(intent.metric) or "return"
+        elif measure not in MEASURES:
+            raise ValueError(f"Unsupported ranking measure '{measure}'. Use one of {list(MEASURES)}")
+        if descending is None:
+            descending = parse_descending(operation)
+        if k is None:
+            k = parse_top_k(operation)
+
+        signature = range_signature(intent.time_range)
+        if signature is None:
+            raise ValueError(f"Could not understand time range '{intent.time_range}'")
+
+        self.refresh()
+        range_index = self._signatures.get(signature)
+        if range_index is not None:
+            rows = self.top_k(metric, range_index, measure, k, descending)
+            source = "matrix"
+        else:
+            rows = self._scan(metric, measure, intent.time_range, k, descending)
+            source = "scan"
+
+        result = {
+            "entity": None,
+            "metric": metric,
+            "operation": "rank",
+            "measure": measure,
+            "time_range": intent.time_range,
+            "descending": descending,
+            "entities": len(self.entities),
+            "source": source,
+            "rankings": [
+                {"rank": n, "entity": entity, "value": value}
+                for n, (entity, value) in enumerate(rows, start=1)
+            ]
+        }
+        result["summary"] = summarize(result)
+        return result
+
+    def _scan(self, metric: str, measure: str, time_range: str, k: int, descending: bool) -> List[Tuple[str, float]]:
+        # Ranges outside the matrix: compute each entity (O(1) per entity once indexed)
+        rows = []
+        for entity in get_entity_files():
+            try:
+                value = analytics_engine.compute(entity, metric, measure, None, time_range).get("value")
+            except ValueError:
+                continue
+            if value is not None:
+                rows.append((entity, value))
+        rows.sort(key=lambda row: row[1], reverse=descending)
+        return rows[:k]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entities": len(self.entities),
+                "columns": self.width,
+                "bytes": self._matrix.nbytes,
+                "rows_computed": self.rows_computed
+            }
+
+
+ranking_engine = RankingEngine()
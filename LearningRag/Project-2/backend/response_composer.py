@@ -11,25 +11,25 @@ Following the architecture principles:
 - AI references data sources
 """
 
-from typing import Dict, Any, Optional
+import hashlib
+import json
+from typing import Dict, Any, Iterator, Optional
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-import os
+from llm_client import pool
+from singleflight import coalesced
+
+
+# Client settings for summarization; the client itself comes from the shared pool
+COMPOSER_LLM_PARAMS = {
+    "task": "conversational",
+    "temperature": 0.3,
+    "max_new_tokens": 500,
+}
 
 
 def get_llm():
-    """Get the LLM for response composition."""
-    api_token = os.environ.get("HUGGINGFACE_API_TOKEN", "")
-    
-    endpoint = HuggingFaceEndpoint(
-        repo_id="mistralai/Mistral-7B-Instruct-v0.2",
-        task="conversational",
-        temperature=0.3,
-        max_new_tokens=500,
-        huggingfacehub_api_token=api_token
-    )
-    
-    return ChatHuggingFace(llm=endpoint)
+    """Get the shared LLM for response composition."""
+    return pool.get(**COMPOSER_LLM_PARAMS)
 
 
 SUMMARY_PROMPT = """You are a financial analyst AI assistant. You summarize forecast results clearly and concisely.
@@ -62,19 +62,15 @@ Last Updated: {last_updated}
 Generate a 2-3 sentence summary of this forecast. Be specific about the trend and include the confidence level."""
 
 
-def compose_response(
-    forecast_result: Dict[str, Any],
-    use_llm: bool = True
-) -> str:
+def _format_summary_messages(forecast_result: Dict[str, Any]) -> list:
     """
-    Compose a human-readable response from forecast results.
+    Build the summarization prompt messages for a forecast result.
     
     Args:
         forecast_result: Structured output from ForecastingPipeline
-        use_llm: Whether to use LLM for summarization (False for fallback)
     
     Returns:
-        Human-readable summary string
+        Chat messages ready for the LLM
     """
     metadata = forecast_result.get("metadata", {})
     metrics = forecast_result.get("metrics", {})
@@ -88,28 +84,58 @@ def compose_response(
         )
     forecast_preview = "\n".join(preview_lines)
     
+    prompt = ChatPromptTemplate.from_messages([
+        ("user", SUMMARY_PROMPT)
+    ])
+    
+    return prompt.format_messages(
+        entity=metadata.get("entity", "Unknown"),
+        metric=metadata.get("metric", "Unknown"),
+        horizon=metadata.get("horizon_days", 0),
+        model=metadata.get("model", "prophet"),
+        trend=metrics.get("trend", "unknown"),
+        growth_rate=f"{metrics.get('avg_growth_rate', 0) * 100:.2f}%",
+        volatility=metrics.get("volatility", "unknown"),
+        confidence=f"{metrics.get('confidence', 0) * 100:.1f}%",
+        forecast_preview=forecast_preview,
+        historical_records=metadata.get("historical_records", 0),
+        last_updated=metadata.get("last_updated", "Unknown")
+    )
+
+
+def _compose_key(forecast_result: Dict[str, Any], use_llm: bool = True) -> Optional[str]:
+    # Template summaries are cheap; only LLM summaries are coalesced
+    if not use_llm:
+        return None
+    payload = json.dumps(forecast_result, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@coalesced(_compose_key)
+def compose_response(
+    forecast_result: Dict[str, Any],
+    use_llm: bool = True
+) -> str:
+    """
+    Compose a human-readable response from forecast results.
+    
+    Concurrent LLM summaries of the same result share one call.
+    
+    Args:
+        forecast_result: Structured output from ForecastingPipeline
+        use_llm: Whether to use LLM for summarization (False for fallback)
+    
+    Returns:
+        Human-readable summary string
+    """
+    metadata = forecast_result.get("metadata", {})
+    metrics = forecast_result.get("metrics", {})
+    forecasts = forecast_result.get("forecast", [])
+    
     if use_llm:
         try:
-            llm = get_llm()
-            prompt = ChatPromptTemplate.from_messages([
-                ("user", SUMMARY_PROMPT)
-            ])
-            
-            formatted = prompt.format_messages(
-                entity=metadata.get("entity", "Unknown"),
-                metric=metadata.get("metric", "Unknown"),
-                horizon=metadata.get("horizon_days", 0),
-                model=metadata.get("model", "prophet"),
-                trend=metrics.get("trend", "unknown"),
-                growth_rate=f"{metrics.get('avg_growth_rate', 0) * 100:.2f}%",
-                volatility=metrics.get("volatility", "unknown"),
-                confidence=f"{metrics.get('confidence', 0) * 100:.1f}%",
-                forecast_preview=forecast_preview,
-                historical_records=metadata.get("historical_records", 0),
-                last_updated=metadata.get("last_updated", "Unknown")
-            )
-            
-            response = llm.invoke(formatted)
+            formatted = _format_summary_messages(forecast_result)
+            response = pool.invoke(formatted, **COMPOSER_LLM_PARAMS)
             return response.content
             
         except Exception as e:
@@ -120,6 +146,36 @@ def compose_response(
         return _compose_fallback(metadata, metrics, forecasts)
 
 
+def stream_response(forecast_result: Dict[str, Any]) -> Iterator[str]:
+    """
+    Stream a forecast summary from the LLM as it is generated.
+    
+    Falls back to the template summary (sent as a single fragment) if the
+    LLM fails before producing any output.
+    
+    Args:
+        forecast_result: Structured output from ForecastingPipeline
+    
+    Yields:
+        Summary text fragments
+    """
+    produced = False
+    try:
+        formatted = _format_summary_messages(forecast_result)
+        for token in pool.stream(formatted, **COMPOSER_LLM_PARAMS):
+            produced = True
+            yield token
+    except Exception as e:
+        if produced:
+            raise
+        print(f"LLM summarization failed, using fallback: {e}")
+        yield _compose_fallback(
+            forecast_result.get("metadata", {}),
+            forecast_result.get("metrics", {}),
+            forecast_result.get("forecast", [])
+        )
+
+
 def _compose_fallback(
     metadata: Dict[str, Any],
     metrics: Dict[str, Any],
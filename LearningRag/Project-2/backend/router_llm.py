@@ -1,172 +1,265 @@
-from typing import Optional
-from langchain_core.prompts import ChatPromptTemplate 
-from langchain_core.output_parsers import PydanticOutputParser
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from schema import ConversationState, RouterOutput
-
-endpoint = HuggingFaceEndpoint(
-    repo_id="mistralai/Mistral-7B-Instruct-v0.2",
-    task="conversational",
-    temperature=0.0,
-    max_new_tokens=300,
-     huggingfacehub_api_token=""
-)
-
-llm = ChatHuggingFace(llm=endpoint)
-
-
-parser = PydanticOutputParser(pydantic_object=RouterOutput)
-
-SYSTEM_PROMPT = """
-You are a Router LLM for a data copilot.
-
-You NEVER answer questions.
-You ONLY decide which pipeline should handle the request.
-
-AVAILABLE ROUTES:
-- analytics: past or present metrics, rankings, trends
-- forecast: future predictions
-- rag: definitions, explanations, documentation
-- both: analytics + rag
-- clarification: missing required information
-
-RULES:
-- Output MUST be valid JSON
-- Do NOT include explanations
-- Do NOT invent metrics or entities
-- If required parameters are missing, use route = "clarification"
-
-CONVERSATION CONTEXT RULES:
-
-- You may receive a PREVIOUS INTENT.
-- If the user asks a follow-up:
-  - Inherit all fields from the previous intent
-  - Override ONLY the fields explicitly mentioned
-- If a follow-up changes the meaning ambiguously:
-  - route MUST be "clarification"
-- If there is no previous intent:
-  - treat the question as a new request
-
-PREVIOUS INTENT (if any):
-You are a Router LLM for a data copilot.
-
-You NEVER answer questions.
-You ONLY decide which pipeline should handle the request.
-
-AVAILABLE ROUTES:
-- analytics: past or present metrics, rankings, trends
-- forecast: future predictions
-- rag: definitions, explanations, documentation
-- both: analytics + rag
-- clarification: missing required information
-
-GENERAL RULES:
-- Output MUST be valid JSON
-- Do NOT include explanations
-- Do NOT invent metrics or entities
-- Do NOT infer missing values
-- If required parameters are missing or unclear, use route = "clarification"
-
-CONVERSATION CONTEXT RULES:
-
-- You may receive a PREVIOUS INTENT.
-- If the user asks a follow-up:
-  - Inherit ALL fields from the previous intent
-  - Override ONLY the fields explicitly mentioned
-- If the new question requires a DIFFERENT route than the previous one:
-  - You MUST discard incompatible intent fields
-- NEVER mix incompatible intents across routes
-
-AMBIGUITY RULES (STRICT):
-
-A request is ambiguous if:
-- The comparison type is unclear (e.g. “compare it”)
-- The metric is unspecified or vague
-- The time range is missing or underspecified
-- The entity is unclear
-- Multiple interpretations are equally valid
-
-If ambiguity exists:
-- route MUST be "clarification"
-- needs_clarification MUST be true
-- ALL intent fields MUST be null
-
-If there is no previous intent:
-- Treat the question as a new request
+import json
+import os
+import re
+from typing import Any, List, Optional, Tuple
 
-PREVIOUS INTENT (if any):
-{previous_intent}
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from pydantic import ValidationError
 
-ROUTING RULES (STRICT):
-
-- If route = "analytics":
-  analytics_intent MUST be present and non-null
-  forecast_intent MUST be null
-  rag_intent MUST be null
-
-- If route = "forecast":
-  forecast_intent MUST be present and non-null
-  analytics_intent MUST be null
-  rag_intent MUST be null
-
-- If route = "rag":
-  rag_intent MUST be present and non-null
-  analytics_intent MUST be null
-  forecast_intent MUST be null
-
-- If route = "both":
-  analytics_intent MUST be present and non-null
-  rag_intent MUST be present and non-null
-  forecast_intent MUST be null
-
-- If required fields cannot be determined:
-  route MUST be "clarification"
-  needs_clarification MUST be true
-  ALL intent fields MUST be null
-
-NEVER return a route without its required intent.
-
-AMBIGUITY RULES:
-If an analytics request does not specify a concrete entity
-(e.g. uses generic terms like "assets", "products", "items"):
-- route MUST be "clarification"
-- needs_clarification MUST be true
-- ALL intent fields MUST be null
-
-
-OUTPUT RULES (STRICT):
-
-- You MUST output ALL fields defined in the schema
-- You MUST always include "needs_clarification"
-- Set "needs_clarification" = true ONLY when route = "clarification"
-- Set "needs_clarification" = false for all other routes
-- NEVER omit required fields
-- NEVER include extra fields
-
-{format_instructions}
-
-"""
-
-USER_PROMPT = "{question}"
+from llm_client import pool
+from router_prompt import build_router_messages
+from schema import ConversationState, RouterOutput
+from singleflight import coalesced
+
+# Client settings for routing; the client itself comes from the shared pool
+ROUTER_LLM_PARAMS = {
+    "task": "conversational",
+    "temperature": 0.0,
+    "max_new_tokens": 300,
+}
+
+# Grammar-constrained decoding: TGI-backed endpoints only emit JSON matching
+# the schema. Set ROUTER_STRUCTURED_OUTPUT=false for backends without it.
+ROUTER_STRUCTURED_OUTPUT = os.environ.get("ROUTER_STRUCTURED_OUTPUT", "true").lower() == "true"
+ROUTER_RESPONSE_FORMAT = {"type": "json", "value": RouterOutput.model_json_schema()}
+
+# Returned when the output cannot be parsed even after one repair attempt
+CLARIFICATION = RouterOutput(route="clarification", needs_clarification=True)
+
+_REQUIRED_INTENTS = {
+    "analytics": ("analytics_intent",),
+    "forecast": ("forecast_intent",),
+    "rag": ("rag_intent",),
+    "both": ("analytics_intent", "rag_intent"),
+    "clarification": (),
+}
+
+
+class RouterOutputError(ValueError):
+    """Model output that is not a usable RouterOutput."""
+
+
+# ============================================================================
+# Tolerant parsing
+# ============================================================================
+
+_PYTHON_LITERALS = {"None": "null", "True": "true", "False": "false"}
+
+
+def _scan_object(text: str, start: int) -> Tuple[Optional[int], str]:
+    """
+    Walk a JSON-ish object from text[start] ("{").
+
+    Returns the end of the object (None if the text is truncated first)
+    and a repaired copy: Python literals and single-quoted strings are
+    converted and trailing commas dropped, all only outside string
+    contents; a truncated object gets its open string and brackets closed.
+    """
+    out, closers = [], []
+    in_string, quote, escaped = False, "", False
+
+    def drop_trailing_comma():
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ",":
+            out.pop()
+
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                # \' isn't a JSON escape; the quote needs none in "..."
+                out.append("'" if ch == "'" else "\\" + ch)
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                in_string = False
+                out.append('"')
+            else:
+                out.append('\\"' if ch == '"' else ch)
+        elif ch in "\"'":
+            in_string, quote = True, ch
+            out.append('"')
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            drop_trailing_comma()
+            if closers:
+                closers.pop()
+            out.append(ch)
+            if not closers:
+                return i + 1, "".join(out)
+        elif ch.isalpha():
+            word = re.match(r"\w+", text[i:]).group()
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    # Truncated output: close what is open
+    if in_string:
+        out.append('"')
+    drop_trailing_comma()
+    if out and out[-1] == ":":
+        out.append("null")
+    return None, "".join(out) + "".join(reversed(closers))
+
+
+def extract_json(text: str) -> Any:
+    """
+    Pull the first JSON object out of model text.
+
+    Handles code fences, prose around the object, trailing commas,
+    Python-style literals (None/True/False, single quotes) and output cut
+    off mid-object. Literal fixes never touch string contents.
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        Decoded JSON value
+
+    Raises:
+        RouterOutputError: If no JSON object can be recovered
+    """
+    start = text.find("{")
+    if start == -1:
+        raise RouterOutputError("no JSON object in output")
+
+    end, repaired = _scan_object(text, start)
+    if end is not None:
+        try:
+            return json.loads(text[start:end])
+        except json.JSONDecodeError:
+            pass
+
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError as e:
+        raise RouterOutputError(f"invalid JSON: {e.msg}") from e
+
+
+def parse_router_output(text: str) -> RouterOutput:
+    """
+    Parse and check model output.
+
+    Tries strict JSON validation first (the constrained-decoding case) and
+    only falls back to tolerant extraction when that fails.
+
+    Raises:
+        RouterOutputError: If the output is unusable
+    """
+    try:
+        output = RouterOutput.model_validate_json(text)
+    except ValidationError:
+        try:
+            output = RouterOutput.model_validate(extract_json(text))
+        except ValidationError as e:
+            raise RouterOutputError(str(e).splitlines()[0]) from e
+
+    missing = [f for f in _REQUIRED_INTENTS[output.route] if getattr(output, f) is None]
+    if missing:
+        raise RouterOutputError(f"route '{output.route}' requires {', '.join(missing)}")
+
+    output.needs_clarification = output.route == "clarification"
+    return output
+
+
+# ============================================================================
+# Routing
+# ============================================================================
+
+def _rejects_response_format(error: Exception) -> bool:
+    """
+    Whether an error means the backend doesn't support response_format.
+
+    Only a client-side TypeError or a 4xx response naming the parameter (or
+    TGI's grammar) counts; timeouts, rate limits, 5xx "model loading" and
+    connection errors are transient and must not switch the feature off.
+    """
+    message = str(error).lower()
+    if isinstance(error, TypeError):
+        return "response_format" in message
+
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None or not 400 <= status < 500 or status in (408, 429):
+        return False
+    message += " " + str(getattr(response, "text", "") or "").lower()
+    return "response_format" in message or "grammar" in message
+
+
+def _invoke(messages: List[BaseMessage]) -> str:
+    global ROUTER_STRUCTURED_OUTPUT
+
+    if ROUTER_STRUCTURED_OUTPUT:
+        try:
+            return pool.invoke(
+                messages,
+                response_format=ROUTER_RESPONSE_FORMAT,
+                **ROUTER_LLM_PARAMS
+            ).content
+        except Exception as e:
+            if not _rejects_response_format(e):
+                raise
+            # Backend rejects response_format: stop asking for it
+            print(f"Constrained decoding unavailable, using plain JSON prompting: {e}")
+            ROUTER_STRUCTURED_OUTPUT = False
+
+    return pool.invoke(messages, **ROUTER_LLM_PARAMS).content
+
+
+def _route_key(question: str, previous_state: Optional[ConversationState] = None) -> tuple:
+    previous = previous_state.last_intent if previous_state else None
+    return (
+        " ".join(question.lower().split()),
+        previous.model_dump_json() if previous else None
+    )
 
-prompt = ChatPromptTemplate.from_messages([
-    ("system", SYSTEM_PROMPT),
-    ("user", USER_PROMPT),
-])
 
+@coalesced(_route_key)
 def route_question(
     question: str,
     previous_state: Optional[ConversationState] = None
 ) -> RouterOutput:
-    formatted_prompt = prompt.format_prompt(
-        question=question,
-        previous_intent=previous_state.last_intent.model_dump()
-            if previous_state and previous_state.last_intent
-            else "None",
-        format_instructions=parser.get_format_instructions()
+    """
+    Route a question with the Router LLM.
+
+    Identical questions (same previous intent) routed concurrently share
+    one LLM call.
+
+    Malformed output gets a single repair attempt (the model sees its reply
+    and the error); if that fails too, the question is routed to
+    clarification instead of raising.
+
+    Args:
+        question: User question
+        previous_state: Conversation state for follow-ups
+
+    Returns:
+        RouterOutput
+    """
+    messages = build_router_messages(
+        question,
+        previous_state.last_intent if previous_state else None
     )
 
-    response = llm.invoke(formatted_prompt.messages)
-    parsed = parser.parse(response.content)
-
-    return parsed
+    content = _invoke(messages)
+    try:
+        return parse_router_output(content)
+    except RouterOutputError as e:
+        error = e
+
+    repair = messages + [
+        AIMessage(content=content),
+        HumanMessage(content=f"That reply is invalid ({error}). Reply with only the corrected JSON object.")
+    ]
+    try:
+        return parse_router_output(_invoke(repair))
+    except RouterOutputError:
+        return CLARIFICATION.model_copy()
@@ -0,0 +1,131 @@
+"""
+Router Prompt Builder
+
+Compiles the Router LLM prompt from the RouterOutput schema instead of
+hand-maintained rules plus PydanticOutputParser's full JSON schema.
+
+- The system message (rules + compact schema) is built once at import and
+  is byte-identical on every call, so backends with KV/prefix caching
+  reuse it across requests
+- Everything that varies (previous intent, question) comes last, in the
+  user message
+"""
+
+import json
+import types
+import typing
+from typing import Any, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from schema import RouterOutput
+
+
+# ============================================================================
+# Schema compilation
+# ============================================================================
+
+_TYPE_NAMES = {str: "str", int: "int", float: "float", bool: "bool"}
+
+
+def describe_type(annotation: Any) -> str:
+    """
+    Compact type notation for a schema annotation.
+
+    Examples: "str|null", "\"daily\"|\"weekly\"", "{entity: str, ...}", "[str]"
+
+    Args:
+        annotation: A field annotation from a pydantic model
+
+    Returns:
+        Type description
+    """
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is typing.Literal:
+        return "|".join(json.dumps(a) for a in args)
+    if origin in (typing.Union, types.UnionType):
+        return "|".join(
+            "null" if a is type(None) else describe_type(a) for a in args
+        )
+    if origin in (list, List):
+        return f"[{describe_type(args[0])}]"
+    if origin is dict:
+        return f"{{{describe_type(args[0])}: {describe_type(args[1])}}}"
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return describe_model(annotation)
+    return _TYPE_NAMES.get(annotation, getattr(annotation, "__name__", str(annotation)))
+
+
+def describe_model(model: type[BaseModel]) -> str:
+    """One-line object notation for a pydantic model, in field order."""
+    fields = ", ".join(
+        f"{name}: {describe_type(field.annotation)}"
+        for name, field in model.model_fields.items()
+    )
+    return f"{{{fields}}}"
+
+
+def compile_schema(model: type[BaseModel]) -> str:
+    """One line per top-level field of `model`."""
+    return "\n".join(
+        f"{name}: {describe_type(field.annotation)}"
+        for name, field in model.model_fields.items()
+    )
+
+
+# ============================================================================
+# Prompt
+# ============================================================================
+
+ROUTER_RULES = """You are the Router LLM of a data copilot. You never answer questions; you only choose the pipeline.
+
+Routes:
+- analytics: past or present metrics, rankings, trends (needs analytics_intent)
+- forecast: future predictions (needs forecast_intent)
+- rag: definitions, explanations, documentation (needs rag_intent)
+- both: analytics + rag (needs analytics_intent and rag_intent)
+- clarification: required information is missing or ambiguous
+
+Rules:
+- Set only the intents the route needs; all others are null
+- Do not invent or infer entities, metrics or time ranges
+- Ambiguous (unclear entity, metric, time range or comparison; generic entities like "assets"): route "clarification", needs_clarification true, all intents null
+- needs_clarification is true only for route "clarification"
+- With a previous intent, a follow-up inherits all its fields and overrides only those the question mentions; if the route changes, drop incompatible intents
+
+Reply with one JSON object with exactly these fields and nothing else:"""
+
+SYSTEM_PROMPT = f"{ROUTER_RULES}\n{compile_schema(RouterOutput)}"
+
+
+def format_previous_intent(previous_intent: Optional[RouterOutput]) -> str:
+    """Compact JSON of the previous intent (null fields omitted), or "none"."""
+    if previous_intent is None:
+        return "none"
+    return previous_intent.model_dump_json(exclude_none=True)
+
+
+def build_router_messages(
+    question: str,
+    previous_intent: Optional[RouterOutput] = None
+) -> List[BaseMessage]:
+    """
+    Build the Router LLM messages.
+
+    Args:
+        question: User question
+        previous_intent: Last routed intent of the conversation, if any
+
+    Returns:
+        [system (static prefix), user (previous intent + question)]
+    """
+    return [
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(content=(
+            f"PREVIOUS INTENT: {format_previous_intent(previous_intent)}\n"
+            f"QUESTION: {question}"
+        ))
+    ]
@@ -97,6 +97,8 @@ class QueryRequest(BaseModel):
     """Request for full end-to-end query handling."""
     question: str
     include_visualization: bool = True
+    # Returned by /query; pass it back so follow-ups inherit the last intent
+    session_id: Optional[str] = None
 
 
 class QueryResponse(BaseModel):
@@ -108,3 +110,4 @@ class QueryResponse(BaseModel):
     rag: Optional[Dict[str, Any]] = None
     needs_clarification: bool = False
     clarification_message: Optional[str] = None
+    session_id: Optional[str] = None
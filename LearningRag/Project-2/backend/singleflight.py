@@ -0,0 +1,106 @@
+"""
+Single-Flight Request Coalescing
+
+When identical requests arrive together (e.g. several dashboard widgets
+asking for the same forecast), only the first runs the work; the others
+wait for it and receive the same result (or the same exception).
+
+Nothing is cached: once the call finishes, the next request with that key
+runs again.
+"""
+
+import copy
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs), or wait for the in-flight call with `key`.
+
+        Args:
+            key: Hashable identity of the request
+            fn: The work to run
+
+        Returns:
+            The shared result; waiters get a deep copy, so they may mutate it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            # Snapshot for the waiters before the caller can mutate it
+            if call.waiters and call.error is None:
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls)
+            }
+
+
+def coalesced(key: Callable[..., Optional[Hashable]]):
+    """
+    Decorator: coalesce concurrent calls whose key(*args, **kwargs) match.
+
+    A key of None runs the call directly. The SingleFlight group is
+    available as `wrapped.flight`.
+    """
+    def decorator(fn):
+        flight = SingleFlight()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            if k is None:
+                return fn(*args, **kwargs)
+            return flight.do(k, fn, *args, **kwargs)
+
+        wrapper.flight = flight
+        return wrapper
+
+    return decorator
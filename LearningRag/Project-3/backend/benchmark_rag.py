@@ -0,0 +1,203 @@
+"""
+Retrieval quality and latency benchmark for the asset RAG pipeline.
+
+    python benchmark_rag.py benchmarks/questions.jsonl
+    python benchmark_rag.py benchmarks/questions.jsonl --llm --tenant acme
+    python benchmark_rag.py benchmarks/questions.jsonl --save-baseline
+
+Each line of the question set is a labelled query:
+
+    {"question": "Who is assigned laptop IT-001?", "relevant": ["IT-001"]}
+    {"question": "...", "relevant": ["assets.csv"], "filter": {"doc_type": "csv"}}
+
+A retrieved chunk is relevant to a label when the label is its vector ID,
+its source file, or appears in its text (case-insensitive). Reports
+recall@k and MRR over the hybrid retrieval candidates, recall over the
+reranked prompt context, and p50/p95/p99 latency per stage (embedding,
+search, rerank and, with --llm, generation).
+
+Every run is appended to --history; with a baseline present the run is
+compared against it and the script exits non-zero on a regression, so it
+can gate deploys after chunking or index changes. Unset
+EMBEDDING_CACHE_PATH so embedding latency is measured against the model.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from config import DEFAULT_TENANT, RERANK_CANDIDATES
+from models.llm_client import pool
+from models.reranker import select_context
+from models.retriever import query_embeddings, retrieve
+from rag.pipline import _build_prompt
+
+
+# ----------------------------
+# Metrics
+# ----------------------------
+
+def is_relevant(label: str, match: dict) -> bool:
+    meta = match["metadata"]
+    return (
+        label == match["id"]
+        or label == meta.get("source")
+        or label.lower() in meta.get("text", "").lower()
+    )
+
+
+def label_recall(labels: list[str], matches: list[dict]) -> float:
+    found = sum(any(is_relevant(label, m) for m in matches) for label in labels)
+    return found / len(labels)
+
+
+def reciprocal_rank(labels: list[str], matches: list[dict]) -> float:
+    for rank, match in enumerate(matches, start=1):
+        if any(is_relevant(label, match) for label in labels):
+            return 1.0 / rank
+    return 0.0
+
+
+def percentiles(samples: list[float]) -> dict:
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2)}
+
+
+def _timed(timings: dict, stage: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+    return result
+
+
+# ----------------------------
+# Benchmark
+# ----------------------------
+
+def load_questions(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+    return [q for q in questions if q.get("relevant")]
+
+
+def run(questions: list[dict], ks: list[int], tenant: str, with_llm: bool) -> dict:
+    top_k = max(max(ks), RERANK_CANDIDATES)
+    timings = {}
+    recalls = {k: [] for k in ks}
+    ranks, context_recalls = [], []
+
+    for q in questions:
+        question, labels = q["question"], q["relevant"]
+
+        # First pass per question misses the cache, so this is model time;
+        # retrieve() below then reuses the cached vector
+        _timed(timings, "embedding", query_embeddings.encode, question)
+        candidates = _timed(
+            timings, "search", retrieve,
+            question, top_k=top_k, filter=q.get("filter"), tenant=tenant
+        )
+        context = _timed(timings, "rerank", select_context, question, candidates[:RERANK_CANDIDATES])
+
+        if with_llm and context:
+            _timed(timings, "llm", pool.invoke, _build_prompt(question, context), temperature=0.0)
+
+        for k in ks:
+            recalls[k].append(label_recall(labels, candidates[:k]))
+        ranks.append(reciprocal_rank(labels, candidates))
+        context_recalls.append(label_recall(labels, context))
+
+    return {
+        "questions": len(questions),
+        "quality": {
+            **{f"recall@{k}": round(float(np.mean(recalls[k])), 4) for k in ks},
+            "mrr": round(float(np.mean(ranks)), 4),
+            "context_recall": round(float(np.mean(context_recalls)), 4)
+        },
+        "latency_ms": {stage: percentiles(samples) for stage, samples in timings.items()}
+    }
+
+
+# ----------------------------
+# History and regression check
+# ----------------------------
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(result: dict, baseline: dict, max_quality_drop: float, max_latency_increase: float) -> list[str]:
+    problems = []
+
+    for metric, before in baseline["quality"].items():
+        after = result["quality"].get(metric)
+        if after is not None and before - after > max_quality_drop:
+            problems.append(f"{metric}: {before:.4f} -> {after:.4f}")
+
+    for stage, before in baseline["latency_ms"].items():
+        after = result["latency_ms"].get(stage)
+        if after is not None and after["p95"] > before["p95"] * (1 + max_latency_increase):
+            problems.append(f"{stage} p95: {before['p95']:.2f} ms -> {after['p95']:.2f} ms")
+
+    return problems
+
+
+def report(result: dict):
+    print(f"{result['questions']} questions")
+    for metric, value in result["quality"].items():
+        print(f"  {metric:<16}{value:>8.4f}")
+
+    print(f"  {'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, p in result["latency_ms"].items():
+        print(f"  {stage:<16}{p['p50']:>10.2f}{p['p95']:>10.2f}{p['p99']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("questions", help="labelled question set (JSONL)")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--tenant", default=DEFAULT_TENANT)
+    parser.add_argument("--llm", action="store_true", help="also time answer generation")
+    parser.add_argument("--history", default="benchmarks/history.jsonl")
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--max-quality-drop", type=float, default=0.02)
+    parser.add_argument("--max-latency-increase", type=float, default=0.25)
+    args = parser.parse_args()
+
+    result = run(load_questions(args.questions), args.k, args.tenant, args.llm)
+    result.update({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "question_set": args.questions,
+        "tenant": args.tenant
+    })
+    report(result)
+
+    os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = regressions(result, json.load(f), args.max_quality_drop, args.max_latency_increase)
+        if problems:
+            print("Regressions against baseline:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print("No regressions against baseline")
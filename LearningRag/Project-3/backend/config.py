@@ -7,3 +7,55 @@ HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENV = os.getenv("PINECONE_ENV")
 PINECONE_INDEX = "asset-rag"
+PINECONE_NAMESPACE = os.getenv("PINECONE_NAMESPACE", "example-namespace")
+
+# Per-source record of the chunk IDs currently stored in the index
+MANIFEST_DIR = os.getenv("MANIFEST_DIR", "manifests")
+
+# Query embedding cache (set EMBEDDING_CACHE_PATH to persist across restarts)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+
+# Answer cache (entries also drop when any of their chunks is re-ingested)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+
+# Shared LLM client pool ("stub" backend for tests/offline runs)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "huggingface")
+LLM_REPO_ID = os.getenv("LLM_REPO_ID", "mistralai/Mistral-7B-Instruct-v0.2")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+LLM_STUB_RESPONSE = os.getenv("LLM_STUB_RESPONSE", "This is a stub response.")
+
+# Hybrid retrieval: BM25 over each tenant's chunks (see models/tenants.py)
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Reranking and prompt packing: over-fetch, rerank ("mmr", "cross-encoder"
+# or "none"), then keep the best chunks that fit the context budget
+RERANK_MODE = os.getenv("RERANK_MODE", "mmr")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "12"))
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+CONTEXT_MAX_CHUNKS = int(os.getenv("CONTEXT_MAX_CHUNKS", "6"))
+
+# Shared model/index resources (loaded lazily; warmed up in the background)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"
+
+# Ingestion: per-file extraction worker processes and embedding batches
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+
+# Structure-aware chunking, sized in tokens (see rag/chunker.py)
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "30"))
+
+# Multi-tenancy: one Pinecone namespace and one local shard (manifests,
+# BM25 and metadata indexes) per tenant; requests without an X-Tenant-ID
+# header use the default tenant, whose shard lives directly in MANIFEST_DIR
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", PINECONE_NAMESPACE)
+TENANT_SHARD_CACHE_SIZE = int(os.getenv("TENANT_SHARD_CACHE_SIZE", "32"))
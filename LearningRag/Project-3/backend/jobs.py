@@ -0,0 +1,6 @@
+import shared_path  # noqa: F401  (makes `shared` importable)
+from shared.jobs import PRIORITIES, Job, JobCancelled, JobQueue  # noqa: F401
+
+
+# Indexing jobs for this backend (see shared/jobs.py)
+job_queue = JobQueue()
@@ -1,28 +1,203 @@
-from fastapi import FastAPI, UploadFile, File
-import shutil
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+import anyio
+import hashlib
 import os
+import json
+import tempfile
+import threading
+from typing import Literal
 
 from rag.ingest import ingest_documents
-from rag.pipline import answer_question
+from rag.pipline import answer_question, stream_answer
 from rag.rag_schema import ChatRequest
+from models.retriever import query_embeddings
+from rag.answer_cache import answer_cache
+from rag.manifest import manifest_file_hash
+from jobs import job_queue
+from models.resources import warm_up
+from models.metadata_index import MetadataIndex
+from models.tenants import shard_directory, tenant_shards, validate_tenant
+from config import WARM_UP_ON_STARTUP
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model and connect the index without delaying startup
+    if WARM_UP_ON_STARTUP:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+UPLOAD_DIR = "uploads"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def save_upload(file: UploadFile, directory: str) -> tuple[anyio.Path, str]:
+    """
+    Stream an upload to a uniquely named .part file in `directory` with
+    async file I/O, hashing as it goes, so ingestion never sees a partial
+    file and concurrent uploads of the same name never share one. Returns
+    the part file and the content's SHA-256.
+    """
+    fd, name = await anyio.to_thread.run_sync(tempfile.mkstemp, ".part", None, directory)
+    os.close(fd)
+    part_path = anyio.Path(name)
+    digest = hashlib.sha256()
+
+    try:
+        async with await part_path.open("wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        await part_path.unlink(missing_ok=True)
+        raise
+
+    return part_path, digest.hexdigest()
+
+
+def _source_name(filename: str | None) -> str:
+    # The stored file is named after the upload's basename
+    source = os.path.basename(filename or "")
+    if source in ("", ".", ".."):
+        raise HTTPException(status_code=400, detail=f"Invalid file name: {filename!r}")
+    return source
+
+
+def _tenant(x_tenant_id: str | None) -> str:
+    try:
+        return validate_tenant(x_tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def index_documents(job, paths: list[str], tenant: str):
+    ingest_documents(paths, tenant=tenant, on_progress=job.checkpoint)
+    return {"documents": len(paths), "tenant": tenant}
 
-app = FastAPI()
 
 @app.post("/upload")
-async def upload(files: list[UploadFile] = File(...)):
+async def upload(
+    files: list[UploadFile] = File(...),
+    priority: Literal["high", "normal", "low"] = "normal",
+    x_tenant_id: str | None = Header(default=None)
+):
+    tenant = _tenant(x_tenant_id)
+    upload_dir = os.path.join(UPLOAD_DIR, tenant)
+    await anyio.Path(upload_dir).mkdir(parents=True, exist_ok=True)
+    manifest_dir = shard_directory(tenant)
+
+    sources = [_source_name(file.filename) for file in files]
     paths = []
+    unchanged = []
+
+    for file, source in zip(files, sources):
+        path = os.path.join(upload_dir, source)
+        part_path, file_hash = await save_upload(file, upload_dir)
+
+        # Same bytes as the last ingest of this source: nothing to do
+        stored_hash = await anyio.to_thread.run_sync(manifest_file_hash, source, manifest_dir)
+        if stored_hash == file_hash:
+            await part_path.unlink()
+            unchanged.append(source)
+            continue
 
-    for file in files:
-        path = f"uploads/{file.filename}"
-        with open(path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        await part_path.rename(path)
         paths.append(path)
 
-    ingest_documents(paths)
+    if not paths:
+        return {"status": "Documents unchanged, nothing to index", "unchanged": unchanged}
 
-    return {"status": "Documents indexed and ready"}
+    # Indexed off the event loop by the job queue; poll /jobs/{job_id}
+    job = job_queue.submit(
+        index_documents, paths, tenant,
+        name=f"{tenant}: " + ", ".join(os.path.basename(p) for p in paths),
+        priority=priority
+    )
+
+    return {
+        "status": "Documents uploaded, indexing started",
+        "job_id": job.id,
+        "unchanged": unchanged
+    }
+
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": [job.to_dict() for job in job_queue.list()]}
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+
+def _validate_filter(expression):
+    # Reject malformed filters before any retrieval work starts
+    if expression:
+        try:
+            MetadataIndex.validate(expression)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid filter: {e}")
 
 
 @app.post("/chat")
-async def chat(req: ChatRequest):
-    return answer_question(req.question)
+def chat(req: ChatRequest, x_tenant_id: str | None = Header(default=None)):
+    tenant = _tenant(x_tenant_id)
+    _validate_filter(req.filter)
+
+    # Indexing jobs pause at their next checkpoint while questions run
+    with job_queue.interactive():
+        return answer_question(req.question, filter=req.filter, tenant=tenant)
+
+
+def _event(event, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse(events):
+    try:
+        with job_queue.interactive():
+            for event, data in events:
+                yield _event(event, data)
+    except Exception as e:
+        # The response has already started: report the failure in-band
+        yield _event("error", {"detail": str(e)})
+        yield _event("done", None)
+
+
+@app.post("/chat/stream")
+def chat_stream(req: ChatRequest, x_tenant_id: str | None = Header(default=None)):
+    tenant = _tenant(x_tenant_id)
+    _validate_filter(req.filter)
+
+    # Sources are sent first, then answer tokens as they are generated
+    return StreamingResponse(
+        _sse(stream_answer(req.question, filter=req.filter, tenant=tenant)),
+        media_type="text/event-stream"
+    )
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "embedding_cache": query_embeddings.stats(),
+        "answer_cache": answer_cache.stats(),
+        "tenant_shards": tenant_shards.stats()
+    }
@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from models.cache import LRUCache, normalize_query
+
+
+class EmbeddingCache:
+    """
+    Query -> embedding cache.
+
+    Tier 1 is an in-memory LRU; tier 2 (optional) is a SQLite file so
+    repeat questions stay warm across restarts.
+    """
+
+    def __init__(self, encode, max_size: int = 1024, disk_path: str | None = None):
+        self._encode = encode
+        self._memory = LRUCache(max_size)
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        self.disk_hits = 0
+
+        if disk_path:
+            directory = os.path.dirname(disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(query TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._disk.commit()
+
+    def encode(self, query: str) -> list[float]:
+        key = normalize_query(query)
+
+        embedding = self._memory.get(key)
+        if embedding is not None:
+            return embedding
+
+        embedding = self._disk_get(key)
+        if embedding is not None:
+            self.disk_hits += 1
+        else:
+            embedding = self._encode(key).astype(np.float32).tolist()
+            self._disk_set(key, embedding)
+
+        self._memory.set(key, embedding)
+        return embedding
+
+    def _disk_get(self, key: str) -> list[float] | None:
+        if self._disk is None:
+            return None
+
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT vector FROM embeddings WHERE query = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def _disk_set(self, key: str, embedding: list[float]):
+        if self._disk is None:
+            return
+
+        blob = np.asarray(embedding, dtype=np.float32).tobytes()
+        with self._disk_lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO embeddings (query, vector) VALUES (?, ?)",
+                (key, blob)
+            )
+            self._disk.commit()
+
+    def stats(self) -> dict:
+        stats = self._memory.stats()
+        # Memory misses served from disk never reached the model
+        lookups = stats["hits"] + stats["misses"]
+        model_calls = stats["misses"] - self.disk_hits
+
+        stats.update({
+            "disk_enabled": self._disk is not None,
+            "disk_hits": self.disk_hits,
+            "model_calls": model_calls,
+            "overall_hit_rate": round(1 - model_calls / lookups, 4) if lookups else 0.0
+        })
+        return stats
@@ -0,0 +1,23 @@
+import shared_path  # noqa: F401  (makes `shared` importable)
+from shared.llm_pool import LLMPool
+
+from config import (
+    HUGGINGFACE_API_KEY,
+    LLM_BACKEND,
+    LLM_REPO_ID,
+    LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT,
+    LLM_QUEUE_TIMEOUT,
+    LLM_STUB_RESPONSE
+)
+
+# Shared chat clients and concurrency slots (see shared/llm_pool.py)
+pool = LLMPool(
+    backend=LLM_BACKEND,
+    repo_id=LLM_REPO_ID,
+    api_token=HUGGINGFACE_API_KEY,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    timeout=LLM_TIMEOUT,
+    queue_timeout=LLM_QUEUE_TIMEOUT,
+    stub_response=LLM_STUB_RESPONSE
+)
@@ -0,0 +1,249 @@
+import bisect
+import os
+import pickle
+import threading
+
+import numpy as np
+
+
+def _mask_from_slots(slots: list[int]) -> int:
+    # Set all bits at once: bool array -> packed bytes -> int
+    if not slots:
+        return 0
+    bits = np.zeros(max(slots) + 1, dtype=bool)
+    bits[slots] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def _slots_from_mask(mask: int) -> np.ndarray:
+    # Inverse of _mask_from_slots: positions of the set bits, ascending
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    return np.flatnonzero(np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder="little"))
+
+
+class MetadataIndex:
+    """
+    Local pre-filter index over chunk metadata.
+
+    Categorical fields (source, doc_type) map each value to a bitmap of
+    slots (a Python int); numeric fields (ingested_at, chunk_id) are kept
+    as sorted (value, slot) arrays for range lookups. Filter expressions use
+    Pinecone's syntax, so the same dict also filters the dense query
+    server-side:
+
+        {"source": "assets.csv"}
+        {"doc_type": {"$in": ["pdf", "docx"]}, "ingested_at": {"$gte": 1735689600}}
+        {"$or": [{"source": "a.md"}, {"source": "b.md"}]}
+    """
+
+    CATEGORICAL = ("source", "doc_type")
+    NUMERIC = ("ingested_at", "chunk_id")
+
+    def __init__(self):
+        self._slots = {}      # doc_id -> slot
+        self._ids = []        # slot -> doc_id (None when free)
+        self._free = []
+        self._live = 0        # bitmap of occupied slots
+        self._bitmaps = {field: {} for field in self.CATEGORICAL}
+        self._sorted = {field: [] for field in self.NUMERIC}
+        self._values = {}     # slot -> indexed field values (for removal)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # ----------------------------
+    # Maintenance
+    # ----------------------------
+
+    def add(self, doc_id: str, metadata: dict):
+        with self._lock:
+            self.remove(doc_id)
+
+            slot = self._free.pop() if self._free else len(self._ids)
+            if slot == len(self._ids):
+                self._ids.append(doc_id)
+            else:
+                self._ids[slot] = doc_id
+            self._slots[doc_id] = slot
+            self._live |= 1 << slot
+
+            values = {f: metadata[f] for f in self.CATEGORICAL + self.NUMERIC if f in metadata}
+            self._values[slot] = values
+
+            for field in self.CATEGORICAL:
+                if field in values:
+                    bitmaps = self._bitmaps[field]
+                    bitmaps[values[field]] = bitmaps.get(values[field], 0) | (1 << slot)
+            for field in self.NUMERIC:
+                if field in values:
+                    bisect.insort(self._sorted[field], (values[field], slot))
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            slot = self._slots.pop(doc_id, None)
+            if slot is None:
+                return
+
+            values = self._values.pop(slot)
+            for field in self.CATEGORICAL:
+                if field in values:
+                    bitmaps = self._bitmaps[field]
+                    bitmaps[values[field]] &= ~(1 << slot)
+                    if not bitmaps[values[field]]:
+                        del bitmaps[values[field]]
+            for field in self.NUMERIC:
+                if field in values:
+                    entries = self._sorted[field]
+                    del entries[bisect.bisect_left(entries, (values[field], slot))]
+
+            self._live &= ~(1 << slot)
+            self._ids[slot] = None
+            self._free.append(slot)
+
+    def update(self, doc_id: str, **fields):
+        with self._lock:
+            slot = self._slots.get(doc_id)
+            if slot is not None:
+                self.add(doc_id, {**self._values[slot], **fields})
+
+    # ----------------------------
+    # Filtering
+    # ----------------------------
+
+    @classmethod
+    def validate(cls, expression):
+        """
+        Raise ValueError unless `expression` is a filter match() can
+        evaluate: known fields and operators, numbers for numeric fields
+        and lists for $in/$nin.
+        """
+        if not isinstance(expression, dict):
+            raise ValueError(f"Expected an object, got {expression!r}")
+
+        for key, condition in expression.items():
+            if key in ("$and", "$or"):
+                if not isinstance(condition, list):
+                    raise ValueError(f"{key} expects a list of filters")
+                for sub in condition:
+                    cls.validate(sub)
+            elif key in cls.CATEGORICAL or key in cls.NUMERIC:
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for op, value in condition.items():
+                    cls._validate_condition(key, op, value)
+            else:
+                raise ValueError(f"Unsupported filter field: {key}")
+
+    @classmethod
+    def _validate_condition(cls, field: str, op: str, value):
+        numeric = field in cls.NUMERIC
+        operators = ("$eq", "$gt", "$gte", "$lt", "$lte") if numeric else ("$eq", "$ne", "$in", "$nin")
+        if op not in operators:
+            raise ValueError(f"Unsupported operator for {field}: {op}")
+
+        if op in ("$in", "$nin"):
+            if not isinstance(value, list):
+                raise ValueError(f"{op} on {field} expects a list")
+            values = value
+        else:
+            values = [value]
+
+        for v in values:
+            if numeric and (isinstance(v, bool) or not isinstance(v, (int, float))):
+                raise ValueError(f"{field} {op} expects a number, got {v!r}")
+            if not numeric and not isinstance(v, (str, int, float, bool)):
+                raise ValueError(f"{field} {op} expects a string or number, got {v!r}")
+
+    def match(self, expression: dict) -> set[str]:
+        """Chunk IDs matching a Pinecone-style filter expression."""
+        with self._lock:
+            mask = self._evaluate(expression)
+            return {self._ids[slot] for slot in _slots_from_mask(mask).tolist()}
+
+    def _evaluate(self, expression: dict) -> int:
+        mask = self._live
+        for key, condition in expression.items():
+            if key == "$and":
+                for sub in condition:
+                    mask &= self._evaluate(sub)
+            elif key == "$or":
+                any_mask = 0
+                for sub in condition:
+                    any_mask |= self._evaluate(sub)
+                mask &= any_mask
+            else:
+                mask &= self._field_mask(key, condition)
+        return mask
+
+    def _field_mask(self, field: str, condition) -> int:
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        mask = self._live
+        for op, value in condition.items():
+            if field in self.CATEGORICAL:
+                mask &= self._categorical_mask(field, op, value)
+            elif field in self.NUMERIC:
+                mask &= self._numeric_mask(field, op, value)
+            else:
+                raise ValueError(f"Unsupported filter field: {field}")
+        return mask
+
+    def _categorical_mask(self, field: str, op: str, value) -> int:
+        bitmaps = self._bitmaps[field]
+        if op == "$eq":
+            return bitmaps.get(value, 0)
+        if op == "$ne":
+            return self._live & ~bitmaps.get(value, 0)
+        if op in ("$in", "$nin"):
+            mask = 0
+            for v in value:
+                mask |= bitmaps.get(v, 0)
+            return mask if op == "$in" else self._live & ~mask
+        raise ValueError(f"Unsupported operator for {field}: {op}")
+
+    def _numeric_mask(self, field: str, op: str, value) -> int:
+        entries = self._sorted[field]
+        lo, hi = 0, len(entries)
+
+        if op == "$eq":
+            lo = bisect.bisect_left(entries, (value, -1))
+            hi = bisect.bisect_right(entries, (value, float("inf")))
+        elif op == "$gt":
+            lo = bisect.bisect_right(entries, (value, float("inf")))
+        elif op == "$gte":
+            lo = bisect.bisect_left(entries, (value, -1))
+        elif op == "$lt":
+            hi = bisect.bisect_left(entries, (value, -1))
+        elif op == "$lte":
+            hi = bisect.bisect_right(entries, (value, float("inf")))
+        else:
+            raise ValueError(f"Unsupported operator for {field}: {op}")
+
+        return _mask_from_slots([slot for _, slot in entries[lo:hi]])
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            state = {k: v for k, v in self.__dict__.items() if k != "_lock"}
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MetadataIndex":
+        index = cls()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                index.__dict__.update(pickle.load(f))
+        return index
+
@@ -0,0 +1,139 @@
+import threading
+
+import numpy as np
+
+from config import (
+    RERANK_MODE,
+    RERANK_MODEL,
+    MMR_LAMBDA,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_MAX_CHUNKS
+)
+from models.resources import get_embedder
+from rag.chunker import count_tokens, truncate_to_tokens
+from models.retriever import query_embeddings
+
+
+_cross_encoder = None
+_cross_encoder_lock = threading.Lock()
+
+
+def _get_cross_encoder():
+    global _cross_encoder
+    if _cross_encoder is None:
+        with _cross_encoder_lock:
+            if _cross_encoder is None:
+                from sentence_transformers import CrossEncoder
+                _cross_encoder = CrossEncoder(RERANK_MODEL)
+    return _cross_encoder
+
+
+# ----------------------------
+# Rerankers
+# ----------------------------
+
+def cross_encoder_rerank(query: str, matches: list[dict]) -> list[dict]:
+    scores = _get_cross_encoder().predict(
+        [(query, m["metadata"]["text"]) for m in matches]
+    )
+    order = np.argsort(-np.asarray(scores))
+    return [{**matches[i], "score": float(scores[i])} for i in order]
+
+
+def _match_vectors(matches: list[dict]) -> np.ndarray:
+    # Unit-length document vectors, embedding only matches without values
+    missing = [i for i, m in enumerate(matches) if m.get("values") is None]
+    encoded = iter(get_embedder().encode(
+        [matches[i]["metadata"]["text"] for i in missing]
+    ) if missing else ())
+
+    vectors = np.asarray(
+        [next(encoded) if m.get("values") is None else m["values"] for m in matches],
+        dtype=np.float32
+    )
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _without_values(match: dict) -> dict:
+    match.pop("values", None)
+    return match
+
+
+def mmr_rerank(query: str, matches: list[dict], lambda_: float = MMR_LAMBDA) -> list[dict]:
+    """
+    Maximal marginal relevance: trade query relevance against similarity
+    to chunks already selected, so near-duplicates don't crowd the prompt.
+
+    Runs on the vectors Pinecone returned with the dense matches; only
+    sparse-only (BM25) hits, which carry none, are embedded here.
+    """
+    doc_vectors = _match_vectors(matches)
+    query_vector = np.asarray(query_embeddings.encode(query))
+    query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+
+    relevance = doc_vectors @ query_vector
+    similarity = doc_vectors @ doc_vectors.T
+
+    selected = []
+    remaining = list(range(len(matches)))
+
+    while remaining:
+        if selected:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining))
+
+        scores = lambda_ * relevance[remaining] - (1 - lambda_) * redundancy
+        best = remaining.pop(int(np.argmax(scores)))
+        selected.append(best)
+
+    return [_without_values({**matches[i], "score": float(relevance[i])}) for i in selected]
+
+
+def rerank(query: str, matches: list[dict], mode: str = RERANK_MODE) -> list[dict]:
+    if len(matches) < 2 or mode == "none":
+        return matches
+    if mode == "cross-encoder":
+        return cross_encoder_rerank(query, matches)
+    if mode == "mmr":
+        return mmr_rerank(query, matches)
+    raise ValueError(f"Unknown rerank mode: {mode}")
+
+
+# ----------------------------
+# Context packing
+# ----------------------------
+
+def pack_context(
+    matches: list[dict],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    max_chunks: int = CONTEXT_MAX_CHUNKS
+) -> list[dict]:
+    """
+    Keep the best-ranked chunks that fit in the prompt token budget.
+
+    The top chunk is always kept, truncated if it alone exceeds the budget,
+    so an oversized first hit can't leave the context empty.
+    """
+    packed = []
+    used = 0
+
+    for m in matches:
+        if len(packed) >= max_chunks:
+            break
+        tokens = count_tokens(m["metadata"]["text"])
+        if not packed and tokens > token_budget:
+            text = truncate_to_tokens(m["metadata"]["text"], token_budget)
+            m = {**m, "metadata": {**m["metadata"], "text": text}}
+            tokens = count_tokens(text)
+        if used + tokens > token_budget:
+            continue
+        packed.append(m)
+        used += tokens
+
+    return packed
+
+
+def select_context(query: str, candidates: list[dict]) -> list[dict]:
+    return pack_context(rerank(query, candidates))
@@ -0,0 +1,66 @@
+import threading
+
+from config import (
+    PINECONE_API_KEY,
+    PINECONE_INDEX,
+    EMBEDDING_MODEL,
+    EMBEDDING_DIM
+)
+
+
+# ----------------------------
+# Lazily initialized shared resources
+# ----------------------------
+# One embedder and one index handle for the whole process, created on
+# first use instead of at import time by every module that needs them.
+
+_lock = threading.Lock()
+_embedder = None
+_index = None
+
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        with _lock:
+            if _embedder is None:
+                from sentence_transformers import SentenceTransformer
+                _embedder = SentenceTransformer(EMBEDDING_MODEL)
+    return _embedder
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = _connect_index()
+    return _index
+
+
+def _connect_index():
+    from pinecone import Pinecone, ServerlessSpec
+
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+
+    if PINECONE_INDEX not in pc.list_indexes().names():
+        pc.create_index(
+            name=PINECONE_INDEX,
+            dimension=EMBEDDING_DIM,
+            metric="cosine",
+            spec=ServerlessSpec(
+                cloud="aws",
+                region="us-east-1"
+            )
+        )
+        print("Index created")
+    else:
+        print("Index already exists")
+
+    return pc.Index(PINECONE_INDEX)
+
+
+def warm_up():
+    """Load the embedder and connect the index ahead of the first request."""
+    get_embedder().encode("warm up")
+    get_index()
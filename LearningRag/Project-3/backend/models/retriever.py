@@ -1,40 +1,104 @@
-from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
-from config import PINECONE_API_KEY, PINECONE_INDEX
+from config import (
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_PATH,
+    HYBRID_CANDIDATES,
+    RERANK_MODE,
+    RRF_K,
+    DEFAULT_TENANT
+)
+from models.embedding_cache import EmbeddingCache
+from models.resources import get_embedder, get_index
+from models.tenants import TenantShard, tenant_shards
+from concurrent.futures import ThreadPoolExecutor
 
 
-# Initialize Pinecone ONCE
-pc = Pinecone(api_key=PINECONE_API_KEY)
+# Repeat questions skip model inference entirely
+query_embeddings = EmbeddingCache(
+    lambda query: get_embedder().encode(query),
+    max_size=EMBEDDING_CACHE_SIZE,
+    disk_path=EMBEDDING_CACHE_PATH
+)
 
-# Load embedder ONCE
-embedder = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+# Dense and sparse searches run side by side
+_search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieve")
 
 
-existing_indexes = pc.list_indexes().names()
+def dense_search(shard: TenantShard, query: str, top_k: int, filter: dict | None = None):
+    query_embedding = query_embeddings.encode(query)
 
-if PINECONE_INDEX not in existing_indexes:
-    pc.create_index(
-        name=PINECONE_INDEX,
-        dimension=384,  # all-MiniLM-L6-v2
-        metric="cosine",
-        spec=ServerlessSpec(
-            cloud="aws",
-            region="us-east-1"
-        )
+    # Only the tenant's namespace is searched; Pinecone applies the same
+    # filter expression server-side. MMR reranks on the stored vectors, so
+    # they come back with the matches instead of being re-embedded.
+    include_values = RERANK_MODE == "mmr"
+    results = get_index().query(
+        vector=query_embedding,
+        top_k=top_k,
+        namespace=shard.namespace,
+        filter=filter or None,
+        include_metadata=True,
+        include_values=include_values
     )
-    print("Index created")
-else:
-    print("Index already exists")
 
-index = pc.Index(PINECONE_INDEX)
+    matches = []
+    for m in results["matches"]:
+        match = {"id": m["id"], "score": m["score"], "metadata": m["metadata"]}
+        if include_values and m.get("values"):
+            match["values"] = m["values"]
+        matches.append(match)
+    return matches
 
-def retrieve(query: str, top_k: int = 4):
-    query_embedding = embedder.encode(query).tolist()
 
-    results = index.query(
-        vector=query_embedding,
-        top_k=top_k,
-        include_metadata=True
-    )
+def sparse_search(shard: TenantShard, query: str, top_k: int, allowed: set | None = None):
+    return shard.sparse.search(query, top_k=top_k, allowed=allowed)
+
+
+def reciprocal_rank_fusion(result_lists, top_k: int, k: int = RRF_K):
+    """Merge ranked match lists: score(d) = sum over lists of 1 / (k + rank)."""
+    fused = {}
+
+    for matches in result_lists:
+        for rank, match in enumerate(matches, start=1):
+            entry = fused.setdefault(match["id"], {**match, "score": 0.0})
+            entry["score"] += 1.0 / (k + rank)
+
+    return sorted(fused.values(), key=lambda m: m["score"], reverse=True)[:top_k]
+
+
+def retrieve(
+    query: str,
+    top_k: int = 4,
+    filter: dict | None = None,
+    tenant: str = DEFAULT_TENANT
+):
+    """
+    Hybrid retrieval: dense (MiniLM + Pinecone) and sparse (BM25) searches
+    run concurrently and are merged with reciprocal-rank fusion, so exact
+    matches on asset names, IDs and tickers survive alongside semantic hits.
+
+    `filter` is a Pinecone-style metadata expression over source, doc_type,
+    ingested_at and chunk_id. It is resolved against the local metadata
+    index first: BM25 only scores the surviving chunks, and a filter that
+    matches nothing returns without touching the model or Pinecone. An
+    empty local shard only short-circuits when its manifests record an
+    empty corpus; otherwise the dense query still runs.
+
+    Only `tenant`'s shard and namespace are searched, so query cost depends
+    on that tenant's corpus, not the platform's.
+    """
+    candidates = max(top_k, HYBRID_CANDIDATES)
+    shard = tenant_shards.get(tenant)
+    if shard.known_empty():
+        return []
+
+    # The local pre-filter is only authoritative when the local indexes hold
+    # the corpus; otherwise Pinecone applies the filter on its own
+    allowed = None
+    if filter and len(shard):
+        allowed = shard.metadata.match(filter)
+        if not allowed:
+            return []
+
+    dense = _search_pool.submit(dense_search, shard, query, candidates, filter)
+    sparse = _search_pool.submit(sparse_search, shard, query, candidates, allowed)
 
-    return results["matches"]
+    return reciprocal_rank_fusion([dense.result(), sparse.result()], top_k)
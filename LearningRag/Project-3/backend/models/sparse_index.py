@@ -0,0 +1,138 @@
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercased word tokens. Compound identifiers (asset IDs, account
+    numbers, tickers like "IT-001" or "BRK.B") are kept whole and also
+    split into their parts, so both forms match.
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        parts = re.split(r"[-_./]", token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p)
+    return tokens
+
+
+class BM25Index:
+    """In-process inverted index with Okapi BM25 scoring."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}   # term -> {doc_id: term frequency}
+        self._lengths = {}    # doc_id -> token count
+        self._metadata = {}   # doc_id -> metadata (incl. text)
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._lengths
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: str, text: str, metadata: dict):
+        with self._lock:
+            if doc_id in self._lengths:
+                self.remove(doc_id)
+
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+
+            length = sum(counts.values())
+            self._lengths[doc_id] = length
+            self._metadata[doc_id] = metadata
+            self._total_length += length
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            if doc_id not in self._lengths:
+                return
+
+            for term in set(tokenize(self._metadata[doc_id]["text"])):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+            self._total_length -= self._lengths.pop(doc_id)
+            del self._metadata[doc_id]
+
+    def update_metadata(self, doc_id: str, **fields):
+        with self._lock:
+            if doc_id in self._metadata:
+                self._metadata[doc_id] = {**self._metadata[doc_id], **fields}
+
+    def items(self):
+        with self._lock:
+            return list(self._metadata.items())
+
+    def search(self, query: str, top_k: int = 10, allowed: set | None = None) -> list[dict]:
+        """
+        Return Pinecone-style matches: {"id", "score", "metadata"}.
+        With `allowed`, only those doc IDs are scored.
+        """
+        with self._lock:
+            n_docs = len(self._lengths)
+            if n_docs == 0:
+                return []
+
+            avg_length = self._total_length / n_docs
+            scores = {}
+
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            return [
+                {"id": doc_id, "score": score, "metadata": self._metadata[doc_id]}
+                for doc_id, score in best
+            ]
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            state = (self._postings, self._lengths, self._metadata, self._total_length)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        index = cls()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                (index._postings, index._lengths,
+                 index._metadata, index._total_length) = pickle.load(f)
+        return index
+
@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from config import DEFAULT_TENANT, MANIFEST_DIR, TENANT_SHARD_CACHE_SIZE
+from models.metadata_index import MetadataIndex
+from models.sparse_index import BM25Index
+from rag.manifest import recorded_chunk_count
+
+
+_TENANT_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def validate_tenant(tenant: str | None) -> str:
+    if tenant is None:
+        return DEFAULT_TENANT
+    if not _TENANT_RE.match(tenant):
+        raise ValueError("Tenant IDs are 1-64 letters, digits, '-' or '_'")
+    return tenant
+
+
+def shard_directory(tenant: str) -> str:
+    # The default tenant keeps the pre-multi-tenant layout
+    if tenant == DEFAULT_TENANT:
+        return MANIFEST_DIR
+    return os.path.join(MANIFEST_DIR, "tenants", tenant)
+
+
+# ----------------------------
+# Per-tenant shard
+# ----------------------------
+
+class TenantShard:
+    """
+    Everything one tenant's retrieval touches: its Pinecone namespace and
+    the local manifests, BM25 and metadata indexes under its directory.
+    """
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        self.namespace = tenant
+        self.directory = shard_directory(tenant)
+
+        self.sparse = BM25Index.load(self._path("bm25.pkl"))
+        self.metadata = MetadataIndex.load(self._path("metadata.pkl"))
+        if not len(self.metadata) and len(self.sparse):
+            # Corpora ingested before the metadata index existed
+            for doc_id, metadata in self.sparse.items():
+                self.metadata.add(doc_id, metadata)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def __len__(self) -> int:
+        return len(self.sparse)
+
+    def known_empty(self) -> bool:
+        """
+        True only when the manifests record an empty corpus. An empty local
+        index alone isn't proof: the namespace may hold vectors ingested
+        before the local files were lost or rebuilt.
+        """
+        return not len(self) and recorded_chunk_count(self.directory) == 0
+
+    def save(self):
+        self.sparse.save(self._path("bm25.pkl"))
+        self.metadata.save(self._path("metadata.pkl"))
+
+
+# ----------------------------
+# Shard cache
+# ----------------------------
+
+class ShardCache:
+    """
+    Lazily loaded tenant shards, LRU-evicted beyond `max_shards`. Shards
+    pinned by use() (e.g. during ingestion) are never evicted, so there is
+    only ever one live copy of a tenant's indexes.
+    """
+
+    def __init__(self, max_shards: int = TENANT_SHARD_CACHE_SIZE):
+        self.max_shards = max_shards
+        self._shards = OrderedDict()
+        self._pins = Counter()
+        self._loading = {}    # tenant -> lock held while its shard loads
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, tenant: str) -> TenantShard:
+        with self._lock:
+            shard = self._cached(tenant)
+            if shard is not None:
+                return shard
+            loading = self._loading.setdefault(tenant, threading.Lock())
+
+        # Unpickling the indexes is slow: do it outside the cache lock so
+        # other tenants aren't blocked, and at most once per tenant
+        with loading:
+            with self._lock:
+                shard = self._cached(tenant)
+                if shard is not None:
+                    return shard
+            try:
+                shard = TenantShard(tenant)
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(tenant, None)
+                raise
+
+            with self._lock:
+                self._loading.pop(tenant, None)
+                self._shards[tenant] = shard
+                self.loads += 1
+                self._shards.move_to_end(tenant)
+                self._evict()
+                return shard
+
+    def _cached(self, tenant: str) -> TenantShard | None:
+        # Called with the lock held
+        shard = self._shards.get(tenant)
+        if shard is not None:
+            self._shards.move_to_end(tenant)
+            self._evict()
+        return shard
+
+    @contextmanager
+    def use(self, tenant: str):
+        with self._lock:
+            self._pins[tenant] += 1
+        try:
+            yield self.get(tenant)
+        finally:
+            with self._lock:
+                self._pins[tenant] -= 1
+                if not self._pins[tenant]:
+                    del self._pins[tenant]
+                self._evict()
+
+    def _evict(self):
+        # Called with the lock held; oldest unpinned shards go first
+        for tenant in list(self._shards):
+            if len(self._shards) <= self.max_shards:
+                break
+            if tenant not in self._pins:
+                del self._shards[tenant]
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": len(self._shards),
+                "max_shards": self.max_shards,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
+
+tenant_shards = ShardCache()
@@ -0,0 +1,58 @@
+import threading
+
+from config import ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL
+from models.cache import LRUCache, normalize_query
+from rag.prompt import PROMPT_VERSION
+
+
+class AnswerCache:
+    """
+    Answers keyed on (normalized question, sorted chunk IDs, prompt version).
+
+    Generation runs at temperature 0.0, so the same question over the same
+    chunks yields the same answer. A reverse index chunk ID -> keys lets
+    ingestion drop every answer built from a chunk that changed.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._entries = LRUCache(max_size, ttl=ttl, on_evict=self._forget)
+        self._by_chunk = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(question: str, chunk_ids: list[str]) -> tuple:
+        return (normalize_query(question), tuple(sorted(chunk_ids)), PROMPT_VERSION)
+
+    def get(self, key: tuple):
+        return self._entries.get(key)
+
+    def set(self, key: tuple, answer: dict):
+        with self._lock:
+            for chunk_id in key[1]:
+                self._by_chunk.setdefault(chunk_id, set()).add(key)
+        self._entries.set(key, answer)
+
+    def invalidate(self, chunk_ids):
+        with self._lock:
+            keys = set()
+            for chunk_id in chunk_ids:
+                keys |= self._by_chunk.pop(chunk_id, set())
+
+        for key in keys:
+            self._entries.pop(key)
+            self._forget(key)
+
+    def _forget(self, key: tuple):
+        with self._lock:
+            for chunk_id in key[1]:
+                keys = self._by_chunk.get(chunk_id)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._by_chunk[chunk_id]
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+answer_cache = AnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL)
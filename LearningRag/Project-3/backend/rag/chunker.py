@@ -0,0 +1,44 @@
+import shared_path  # noqa: F401  (makes `shared` importable)
+from shared.chunker import StructuredChunker as _StructuredChunker, TokenCounter, overlap_length  # noqa: F401
+
+from config import CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, EMBEDDING_MODEL
+
+# Chunks are sized in the embedding model's tokens (see shared/chunker.py)
+TOKENIZER_MODEL = EMBEDDING_MODEL
+
+token_counter = TokenCounter(TOKENIZER_MODEL)
+count_tokens = token_counter.count
+truncate_to_tokens = token_counter.truncate
+
+
+class StructuredChunker(_StructuredChunker):
+    # The shared chunker with this backend's tokenizer and sizes
+    def __init__(self, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        super().__init__(token_counter, max_tokens, overlap_tokens)
+
+
+# ----------------------------
+# Overlap spans
+# ----------------------------
+
+def strip_overlaps(matches: list[dict]) -> list[str]:
+    """
+    Context texts for the prompt with overlapping text sent once: when a
+    chunk's predecessor (same source, chunk_id - 1) is also in the context,
+    its recorded leading overlap is dropped.
+    """
+    present = {
+        (m["metadata"].get("source"), int(m["metadata"].get("chunk_id", -1)))
+        for m in matches
+    }
+
+    texts = []
+    for m in matches:
+        meta = m["metadata"]
+        text = meta["text"]
+        overlap = int(meta.get("overlap", 0))
+        if overlap and (meta.get("source"), int(meta.get("chunk_id", -1)) - 1) in present:
+            text = text[overlap:].lstrip()
+        if text:
+            texts.append(text)
+    return texts
@@ -0,0 +1,207 @@
+import csv
+import hashlib
+import os
+import queue
+from html.parser import HTMLParser
+
+from rag.chunker import StructuredChunker
+
+
+# Text is handed to the splitter in windows of about this many characters
+BLOCK_SIZE = 64 * 1024
+CSV_ROWS_PER_BLOCK = 50
+
+
+# ----------------------------
+# Per-format streaming extractors
+# ----------------------------
+# Each yields text blocks incrementally so a file is never held in memory
+# as a whole.
+
+def extract_pdf(path: str):
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    for page in reader.pages:
+        yield (page.extract_text() or "") + "\n\n"
+
+
+def extract_docx(path: str):
+    try:
+        from docx import Document
+    except ImportError as e:
+        raise ImportError("DOCX ingestion requires python-docx (pip install python-docx)") from e
+
+    document = Document(path)
+    for paragraph in document.paragraphs:
+        yield paragraph.text + "\n"
+    for table in document.tables:
+        for row in table.rows:
+            yield "| " + " | ".join(cell.text for cell in row.cells) + " |\n"
+
+
+class _HTMLTextParser(HTMLParser):
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article"}
+    SKIP_TAGS = {"script", "style", "head"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts = []
+        return text
+
+
+def extract_html(path: str):
+    parser = _HTMLTextParser()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while block := f.read(BLOCK_SIZE):
+            parser.feed(block)
+            yield parser.drain()
+    parser.close()
+    yield parser.drain()
+
+
+def extract_csv(path: str):
+    # Rows become "header: value" lines so each chunk is self-describing
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        lines = []
+        for row in reader:
+            lines.append("; ".join(f"{h}: {v}" for h, v in zip(header, row)))
+            if len(lines) >= CSV_ROWS_PER_BLOCK:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+
+def extract_plain(path: str):
+    # Markdown, plain text and extension-less files (e.g. demo_assets_owned)
+    with open(path, "r", encoding="utf-8") as f:
+        while block := f.read(BLOCK_SIZE):
+            yield block
+
+
+EXTRACTORS = {
+    ".pdf": extract_pdf,
+    ".docx": extract_docx,
+    ".html": extract_html,
+    ".htm": extract_html,
+    ".csv": extract_csv,
+    ".md": extract_plain,
+    ".markdown": extract_plain,
+    ".txt": extract_plain,
+}
+
+
+def document_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return ext.lstrip(".") if ext in EXTRACTORS else "txt"
+
+
+def extract_text(path: str):
+    ext = os.path.splitext(path)[1].lower()
+    return EXTRACTORS.get(ext, extract_plain)(path)
+
+
+# ----------------------------
+# Incremental splitting
+# ----------------------------
+
+def split_stream(blocks, splitter, window: int = BLOCK_SIZE):
+    """
+    Feed text blocks through the splitter as they arrive. The last chunk of
+    each window is carried over into the next one, so chunk boundaries
+    match what splitting the whole text at once would give (closely), while
+    memory stays bounded by the window size. A carry-over that reaches
+    twice the window (text the splitter cannot break, e.g. a long run
+    without separators) is flushed as it is.
+    """
+    buffer = ""
+    for block in blocks:
+        buffer += block
+        if len(buffer) < window:
+            continue
+
+        chunks = splitter.split_text(buffer)
+        if len(chunks) > 1:
+            yield from chunks[:-1]
+            buffer = chunks[-1]
+
+        if len(buffer) >= 2 * window:
+            yield from chunks[-1:]
+            buffer = ""
+
+    if buffer.strip():
+        yield from splitter.split_text(buffer)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_chunk_batches(path: str, batch_size: int):
+    """Chunks of one file of any format, in lists of at most batch_size."""
+    batch = []
+    for chunk in split_stream(extract_text(path), StructuredChunker()):
+        batch.append(chunk)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _put(out, item, stop) -> bool:
+    # Blocks while the consumer is behind; gives up once it has gone away
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def stream_chunk_batches(path: str, batch_size: int, out, stop):
+    """
+    Worker entry point: puts the file's hash, then its chunk batches, then
+    None on `out`. `out` is bounded, so the worker blocks while the consumer
+    is behind; setting `stop` makes it return early.
+    """
+    try:
+        if not _put(out, file_sha256(path), stop):
+            return
+        for batch in iter_chunk_batches(path, batch_size):
+            if not _put(out, batch, stop):
+                return
+    finally:
+        _put(out, None, stop)
@@ -1,72 +1,225 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from pinecone import Pinecone , ServerlessSpec
-from sentence_transformers import SentenceTransformer
-from config import PINECONE_API_KEY, PINECONE_INDEX
-
-import uuid
+from config import DEFAULT_TENANT, INGEST_WORKERS, EMBED_BATCH_SIZE
+from models.resources import get_embedder, get_index
+from rag.answer_cache import answer_cache
+from models.tenants import tenant_shards
+from rag.chunker import overlap_length
+from rag.extractors import document_type, file_sha256, iter_chunk_batches, stream_chunk_batches
+from rag.manifest import chunk_vector_id, load_manifest, save_manifest
+
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import os
+import time
 
 
 # ----------------------------
-# Global initialization (ONCE)
+# Extraction worker pool
 # ----------------------------
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
-
-existing_indexes = pc.list_indexes().names()
-
-if PINECONE_INDEX not in existing_indexes:
-    pc.create_index(
-        name=PINECONE_INDEX,
-        dimension=384,  # all-MiniLM-L6-v2
-        metric="cosine",
-        spec=ServerlessSpec(
-            cloud="aws",
-            region="us-east-1"
-        )
-    )
-    print("Index created")
-else:
-    print("Index already exists")
-
-index = pc.Index(PINECONE_INDEX)
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
-
-splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=100
-)
+# Chunk batches a worker may get ahead of embedding, per file in flight
+QUEUED_BATCHES = 4
+
+# Pinecone rejects deletes of more than 1000 IDs per request
+DELETE_BATCH_SIZE = 1000
+
+_extract_pool = None
+_extract_manager = None
+
+
+def _get_extract_pool():
+    # spawn, not fork: the API process is multi-threaded and holds torch
+    global _extract_pool, _extract_manager
+    if _extract_pool is None:
+        context = multiprocessing.get_context("spawn")
+        _extract_manager = context.Manager()
+        _extract_pool = ProcessPoolExecutor(max_workers=INGEST_WORKERS, mp_context=context)
+    return _extract_pool, _extract_manager
+
+
+def _receive(out, future):
+    # Items a worker put on `out`, up to its closing None
+    while (item := out.get()) is not None:
+        yield item
+    # Re-raises the worker's exception, if it failed
+    future.result()
+
+
+def _extract_files(file_paths: list[str]):
+    """
+    Yield (path, file hash, chunk batches) per file, in order.
+
+    Extraction and splitting run in the worker pool, at most INGEST_WORKERS
+    files at a time, and each worker can only get QUEUED_BATCHES batches
+    ahead of the consumer. So memory is bounded by a few batches per worker,
+    whatever the file sizes. The batches of one file must be consumed
+    before the next file is requested.
+    """
+    if len(file_paths) == 1:
+        path = file_paths[0]
+        yield path, file_sha256(path), iter_chunk_batches(path, EMBED_BATCH_SIZE)
+        return
+
+    pool, manager = _get_extract_pool()
+    stop = manager.Event()
+    waiting = iter(file_paths)
+    in_flight = deque()
+
+    def submit_next():
+        path = next(waiting, None)
+        if path is not None:
+            out = manager.Queue(maxsize=QUEUED_BATCHES)
+            future = pool.submit(stream_chunk_batches, path, EMBED_BATCH_SIZE, out, stop)
+            in_flight.append((path, out, future))
+
+    for _ in range(INGEST_WORKERS):
+        submit_next()
+
+    try:
+        while in_flight:
+            path, out, future = in_flight.popleft()
+            items = _receive(out, future)
+            file_hash = next(items)  # re-raises if hashing failed
+            yield path, file_hash, items
+            submit_next()
+    finally:
+        # After an abort: release workers blocked on their queues
+        stop.set()
+        for _, _, future in in_flight:
+            future.cancel()
 
 
 # ----------------------------
 # Ingestion function
 # ----------------------------
 
-def ingest_documents(file_paths: list[str]):
-    vectors = []
-
-    for path in file_paths:
-        with open(path, "r", encoding="utf-8") as f:
-            text = f.read()
-
-        chunks = splitter.split_text(text)
-
-        for i, chunk in enumerate(chunks):
-            vector_id = str(uuid.uuid4())
-            embedding = embedder.encode(chunk).tolist()
-
-            vectors.append(
-                {
-                    "id": vector_id,
-                    "values": embedding,
-                    "metadata": {
+def ingest_documents(file_paths: list[str], tenant: str = DEFAULT_TENANT, on_progress=None):
+    """
+    Idempotent ingestion: chunks are addressed by source + content hash, so
+    re-uploading a file only embeds new chunks and deletes vanished ones.
+    Everything is written to `tenant`'s namespace and shard.
+
+    Any supported format (PDF, DOCX, HTML, CSV, Markdown, text) is
+    extracted and split in worker processes and streamed back in batches
+    of EMBED_BATCH_SIZE chunks; each batch is embedded and upserted as it
+    arrives.
+
+    on_progress(fraction, message) is called before each batch; it may
+    raise to abort. Files already finished stay consistently indexed, and
+    the vectors written for the file in progress are rolled back.
+    """
+    with tenant_shards.use(tenant) as shard:
+        try:
+            _ingest(shard, file_paths, on_progress)
+        finally:
+            # Persist finished files before the shard can be evicted
+            shard.save()
+
+
+def _ingest(shard, file_paths: list[str], on_progress):
+    # closing(): stop the workers as soon as a file fails or is cancelled
+    with closing(_extract_files(file_paths)) as files:
+        for n, (path, file_hash, batches) in enumerate(files):
+            _ingest_file(shard, path, file_hash, batches, (n, len(file_paths)), on_progress)
+
+
+def _delete(index, ids: list[str], namespace: str):
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        index.delete(ids=ids[start:start + DELETE_BATCH_SIZE], namespace=namespace)
+
+
+def _ingest_file(shard, path: str, file_hash: str, batches, position, on_progress):
+    index = get_index()
+    embedder = get_embedder()
+    namespace = shard.namespace
+
+    source = os.path.basename(path)
+    doc_type = document_type(path)
+    ingested_at = int(time.time())
+
+    previous = load_manifest(source, shard.directory)
+    previous_at = {position: vid for vid, position in previous.items()}
+    current = {}
+    new_ids = []   # upserted for this file so far
+    indexed = []   # added to the sparse and metadata indexes so far
+    # Kept chunks whose position or predecessor changed: their chunk_id and
+    # overlap metadata must be rewritten (vector_id -> overlap)
+    stale = {}
+    i, last_chunk, last_id = 0, None, None
+
+    try:
+        for batch in batches:
+            if on_progress:
+                n, total = position
+                on_progress(n / total, f"{source}: {i} chunks read, {len(new_ids)} new")
+
+            metadata = {}
+            for chunk in batch:
+                vector_id = chunk_vector_id(source, chunk)
+                if vector_id not in current:  # else repeated within the file
+                    current[vector_id] = i
+                    metadata[vector_id] = {
                         "text": chunk,
-                        "source": os.path.basename(path),
-                        "chunk_id": i
+                        "source": source,
+                        "chunk_id": i,
+                        "doc_type": doc_type,
+                        "ingested_at": ingested_at,
+                        # Leading characters repeated from chunk i - 1
+                        "overlap": overlap_length(last_chunk, chunk) if i else 0
                     }
-                }
-            )
-
-    if vectors:
-        index.upsert(vectors, namespace="example-namespace")
\ No newline at end of file
+                    if vector_id in previous and (
+                        previous[vector_id] != i
+                        or previous_at.get(previous[vector_id] - 1) != last_id
+                    ):
+                        stale[vector_id] = metadata[vector_id]["overlap"]
+                i, last_chunk, last_id = i + 1, chunk, vector_id
+
+            batch_new = [vid for vid in metadata if vid not in previous]
+            if batch_new:
+                embeddings = embedder.encode([metadata[vid]["text"] for vid in batch_new])
+                index.upsert(
+                    [
+                        {
+                            "id": vector_id,
+                            "values": embedding.tolist(),
+                            "metadata": metadata[vector_id]
+                        }
+                        for vector_id, embedding in zip(batch_new, embeddings)
+                    ],
+                    namespace=namespace
+                )
+                new_ids.extend(batch_new)
+
+            # Only after the upsert succeeded
+            for vector_id, meta in metadata.items():
+                if vector_id not in shard.sparse:
+                    shard.sparse.add(vector_id, meta["text"], meta)
+                    shard.metadata.add(vector_id, meta)
+                    indexed.append(vector_id)
+    except BaseException:
+        # Leave the file as it was before this run: the old manifest
+        # doesn't know these vectors, so nothing else would remove them
+        _delete(index, new_ids, namespace)
+        for vector_id in indexed:
+            shard.sparse.remove(vector_id)
+            shard.metadata.remove(vector_id)
+        raise
+
+    removed = [vid for vid in previous if vid not in current]
+    moved = list(stale)
+
+    for vector_id, overlap in stale.items():
+        # The recorded overlap refers to the predecessor: a moved chunk
+        # with a stale one would lose real text in strip_overlaps
+        fields = {"chunk_id": current[vector_id], "overlap": overlap}
+        index.update(id=vector_id, set_metadata=fields, namespace=namespace)
+        shard.sparse.update_metadata(vector_id, **fields)
+        shard.metadata.update(vector_id, **fields)
+    _delete(index, removed, namespace)
+    for vector_id in removed:
+        shard.sparse.remove(vector_id)
+        shard.metadata.remove(vector_id)
+
+    answer_cache.invalidate(new_ids + moved + removed)
+    save_manifest(source, current, file_hash, shard.directory)
@@ -0,0 +1,80 @@
+import glob
+import hashlib
+import json
+import os
+
+from config import MANIFEST_DIR
+
+
+# ----------------------------
+# Content-addressed chunk IDs
+# ----------------------------
+
+def chunk_vector_id(source: str, chunk: str) -> str:
+    """Stable ID for a chunk: same source + same text -> same vector ID."""
+    source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()[:12]
+    chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:24]
+    return f"{source_hash}-{chunk_hash}"
+
+
+# ----------------------------
+# Per-source manifest
+# ----------------------------
+
+# Each tenant's manifests live in its shard directory
+
+def _manifest_path(source: str, directory: str) -> str:
+    name = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directory, f"{name}.json")
+
+
+def _read(source: str, directory: str) -> dict:
+    path = _manifest_path(source, directory)
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_manifest(source: str, directory: str = MANIFEST_DIR) -> dict[str, int]:
+    """Return {vector_id: chunk_id} for the chunks stored for `source`."""
+    return _read(source, directory).get("chunks", {})
+
+
+def manifest_file_hash(source: str, directory: str = MANIFEST_DIR) -> str | None:
+    """SHA-256 of the file content last ingested for `source`."""
+    return _read(source, directory).get("file_hash")
+
+
+def recorded_chunk_count(directory: str = MANIFEST_DIR) -> int | None:
+    """
+    Chunks recorded across all manifests in `directory`, or None when there
+    are no manifests (nothing was ever ingested from here, or the local
+    state is gone).
+    """
+    paths = glob.glob(os.path.join(directory, "*.json"))
+    if not paths:
+        return None
+
+    total = 0
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            total += len(json.load(f).get("chunks", {}))
+    return total
+
+
+def save_manifest(
+    source: str,
+    chunks: dict[str, int],
+    file_hash: str | None = None,
+    directory: str = MANIFEST_DIR
+):
+    os.makedirs(directory, exist_ok=True)
+    path = _manifest_path(source, directory)
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"source": source, "file_hash": file_hash, "chunks": chunks}, f)
+
+    os.replace(tmp_path, path)
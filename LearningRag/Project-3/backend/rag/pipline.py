@@ -1,27 +1,20 @@
+from config import RERANK_CANDIDATES, DEFAULT_TENANT
 from models.retriever import retrieve
+from models.reranker import select_context
 from rag.prompt import SYSTEM_PROMPT
-from langchain_huggingface import ChatHuggingFace
+from rag.chunker import strip_overlaps
+from rag.answer_cache import answer_cache
+from models.llm_client import pool
 
 
-def answer_question(question: str):
-    matches = retrieve(question)
+NO_ANSWER = "I do not have enough information to answer this."
 
-    if not matches:
-        return {
-            "answer": "I do not have enough information to answer this.",
-            "sources": []
-        }
 
-    context = "\n\n".join(
-        m["metadata"]["text"] for m in matches
-    )
+def _build_prompt(question: str, matches) -> str:
+    # Text shared by adjacent chunks is sent once
+    context = "\n\n".join(strip_overlaps(matches))
 
-    llm = ChatHuggingFace(
-        repo_id="mistralai/Mistral-7B-Instruct-v0.2",
-        temperature=0.0
-    )
-
-    prompt = f"""
+    return f"""
 {SYSTEM_PROMPT}
 
 Context:
@@ -31,9 +24,9 @@ Question:
 {question}
 """
 
-    response = llm.invoke(prompt)
 
-    sources = [
+def _sources(matches) -> list[dict]:
+    return [
         {
             "document": m["metadata"]["source"],
             "chunk_id": str(m["metadata"]["chunk_id"])
@@ -41,7 +34,64 @@ Question:
         for m in matches
     ]
 
-    return {
+
+def answer_question(question: str, filter: dict | None = None, tenant: str = DEFAULT_TENANT):
+    matches = select_context(question, retrieve(question, top_k=RERANK_CANDIDATES, filter=filter, tenant=tenant))
+
+    if not matches:
+        return {
+            "answer": NO_ANSWER,
+            "sources": []
+        }
+
+    cache_key = answer_cache.make_key(question, [m["id"] for m in matches])
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    prompt = _build_prompt(question, matches)
+
+    response = pool.invoke(prompt, temperature=0.0)
+
+    result = {
         "answer": response.content,
-        "sources": sources
+        "sources": _sources(matches)
     }
+    answer_cache.set(cache_key, result)
+
+    return result
+
+
+def stream_answer(question: str, filter: dict | None = None, tenant: str = DEFAULT_TENANT):
+    """
+    Streaming variant of answer_question.
+
+    Yields (event, data) pairs: "sources" first (as soon as retrieval is
+    done), then one "token" per generated fragment, then "done".
+    """
+    matches = select_context(question, retrieve(question, top_k=RERANK_CANDIDATES, filter=filter, tenant=tenant))
+    sources = _sources(matches)
+
+    yield "sources", sources
+
+    if not matches:
+        yield "token", NO_ANSWER
+        yield "done", None
+        return
+
+    cache_key = answer_cache.make_key(question, [m["id"] for m in matches])
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        yield "token", cached["answer"]
+        yield "done", None
+        return
+
+    prompt = _build_prompt(question, matches)
+
+    tokens = []
+    for token in pool.stream(prompt, temperature=0.0):
+        tokens.append(token)
+        yield "token", token
+
+    answer_cache.set(cache_key, {"answer": "".join(tokens), "sources": sources})
+    yield "done", None
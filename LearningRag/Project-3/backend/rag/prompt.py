@@ -1,3 +1,6 @@
+# Bump whenever SYSTEM_PROMPT or the prompt layout changes (answer cache key)
+PROMPT_VERSION = "2"
+
 SYSTEM_PROMPT = """
 You are a personal asset management assistant.
 
@@ -1,8 +1,10 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List, Optional
 
 class ChatRequest(BaseModel):
     question: str
+    # Pinecone-style metadata filter, e.g. {"doc_type": {"$in": ["pdf"]}}
+    filter: Optional[Dict[str, Any]] = None
 
 class Source(BaseModel):
     document: str
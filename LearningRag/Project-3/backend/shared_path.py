@@ -0,0 +1,9 @@
+"""Put LearningRag/ on sys.path so this backend can import the `shared` package."""
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
@@ -0,0 +1,7 @@
+"""
+Modules shared by the three LearningRag backends.
+
+Each backend imports them through a thin local module (llm_client, jobs,
+chunker) that puts this directory's parent on sys.path via shared_path and
+configures the shared class from that backend's own settings.
+"""
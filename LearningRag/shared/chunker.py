@@ -0,0 +1,269 @@
+"""
+Structure-Aware Chunker
+
+Splits extracted text into chunks that respect headings and tables, sized
+in tokens of the embedding model's own tokenizer. all-MiniLM-L6-v2 truncates
+its input at 256 wordpieces, so a chunk counted in characters can silently
+lose its tail at embedding time.
+
+Each backend builds its own `token_counter` and chunker defaults from its
+settings (see the backends' chunker modules).
+"""
+
+import math
+import re
+import threading
+
+
+DEFAULT_TOKENIZER = "sentence-transformers/all-MiniLM-L6-v2"
+
+_HEADING_RE = re.compile(r"^#{1,6}\s+\S")
+_RULE_RE = re.compile(r"^\s*([-=*_])\1{2,}\s*$")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+class TokenCounter:
+    """
+    Token counts and truncation with a Hugging Face tokenizer.
+
+    - The tokenizer is loaded on first use (once per process, including
+      extraction worker processes)
+    - Without transformers or the model files, counting falls back to ~4
+      characters per token and a warning is printed once
+    """
+
+    def __init__(self, model_name: str = DEFAULT_TOKENIZER):
+        self.model_name = model_name
+        self._tokenizer = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        from transformers import AutoTokenizer
+                        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                    except Exception as e:
+                        print(f"Warning: tokenizer {self.model_name} unavailable ({e}); counting ~4 characters per token")
+                    self._loaded = True
+        return self._tokenizer
+
+    @property
+    def name(self) -> str:
+        """What counts are measured in (part of cache keys for chunked text)."""
+        return self.model_name if self._get() is not None else "chars/4"
+
+    def _encode(self, text: str, **kwargs):
+        # verbose=False: texts longer than the model's limit are expected here
+        return self._get()(text, add_special_tokens=False, verbose=False, **kwargs)
+
+    def count(self, text: str) -> int:
+        if self._get() is None:
+            return math.ceil(len(text) / 4)
+        return len(self._encode(text)["input_ids"])
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest word-boundary prefix of text within max_tokens."""
+        if self._get() is None:
+            if self.count(text) <= max_tokens:
+                return text
+            end = max_tokens * 4
+        else:
+            offsets = self._encode(text, return_offsets_mapping=True)["offset_mapping"]
+            if len(offsets) <= max_tokens:
+                return text
+            end = offsets[max_tokens - 1][1] if max_tokens > 0 else 0
+
+        cut = text[:end]
+        if end < len(text) and not text[end].isspace():
+            # Don't keep the first wordpieces of a word that doesn't fit
+            space = cut.rfind(" ")
+            cut = cut[:space] if space > 0 else cut
+        return cut.rstrip()
+
+
+# ----------------------------
+# Structure parsing
+# ----------------------------
+
+def _is_table_row(line: str) -> bool:
+    return line.lstrip().startswith("|")
+
+
+def _blocks(text: str):
+    """
+    Yield (kind, text) blocks: "heading" (Markdown # or underlined),
+    "table" (consecutive |-rows) or "text" (one paragraph).
+    """
+    lines = text.splitlines()
+    i = 0
+
+    while i < len(lines):
+        line = lines[i]
+
+        if not line.strip() or _RULE_RE.match(line):
+            i += 1
+        elif _is_table_row(line):
+            start = i
+            while i < len(lines) and _is_table_row(lines[i]):
+                i += 1
+            yield "table", "\n".join(lines[start:i])
+        elif _HEADING_RE.match(line):
+            yield "heading", line.strip()
+            i += 1
+        elif i + 1 < len(lines) and re.match(r"^\s*(={3,}|-{3,})\s*$", lines[i + 1]):
+            yield "heading", line.strip()
+            i += 2
+        else:
+            start = i
+            while (
+                i < len(lines) and lines[i].strip()
+                and not _is_table_row(lines[i])
+                and not _HEADING_RE.match(lines[i])
+                and not _RULE_RE.match(lines[i])
+            ):
+                i += 1
+            yield "text", " ".join(l.strip() for l in lines[start:i])
+
+
+def _pieces(kind: str, text: str, max_tokens: int, count_tokens) -> list[str]:
+    """Units a block is packed by: sentences for prose, row groups for tables."""
+    if kind == "table":
+        if count_tokens(text) <= max_tokens:
+            return [text]
+
+        # Split by rows; later pieces repeat only the header row (the
+        # |---| separator carries no meaning and costs tokens)
+        rows = text.splitlines()
+        has_separator = len(rows) > 1 and set(rows[1].replace("|", "").strip()) <= set("-: ")
+        body = rows[2:] if has_separator else rows[1:]
+        pieces, current = [], rows[:len(rows) - len(body)]
+        for row in body:
+            if len(current) > 1 and count_tokens("\n".join(current + [row])) > max_tokens:
+                pieces.append("\n".join(current))
+                current = [rows[0]]
+            current.append(row)
+        pieces.append("\n".join(current))
+        return pieces
+
+    units = []
+    for sentence in _SENTENCE_RE.split(text):
+        if count_tokens(sentence) <= max_tokens:
+            units.append(sentence)
+            continue
+
+        # Run-on sentence: fall back to word boundaries
+        current = []
+        for word in sentence.split(" "):
+            if current and count_tokens(" ".join(current + [word])) > max_tokens:
+                units.append(" ".join(current))
+                current = []
+            current.append(word)
+        if current:
+            units.append(" ".join(current))
+    return units
+
+
+# ----------------------------
+# Chunker
+# ----------------------------
+
+def _render(units) -> str:
+    # units: (separator, text, kind); the first separator is dropped
+    return "".join(sep + text if n else text for n, (sep, text, _) in enumerate(units)).strip()
+
+
+class StructuredChunker:
+    """
+    Structure-aware splitter (drop-in for RecursiveCharacterTextSplitter's
+    split_text).
+
+    - A heading always starts a new chunk and stays with the content below it
+    - Tables are never cut mid-row; large tables repeat their header row
+    - Chunks are packed up to max_tokens, counted by token_counter
+    - Overlap is only carried between prose sentences inside a section,
+      never across headings or tables
+    """
+
+    def __init__(self, token_counter: TokenCounter, max_tokens: int = 200, overlap_tokens: int = 30):
+        self.token_counter = token_counter
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def split_text(self, text: str) -> list[str]:
+        count_tokens = self.token_counter.count
+        chunks = []
+        units = []
+
+        def emit():
+            rendered = _render(units)
+            if rendered:
+                chunks.append(rendered)
+
+        for kind, block in _blocks(text):
+            if kind == "heading":
+                # Consecutive headings stay together as the section's path
+                if any(unit[2] != "heading" for unit in units):
+                    emit()
+                    units = []
+                units = units + [("\n\n", block, kind)]
+                continue
+
+            for n, piece in enumerate(_pieces(kind, block, self.max_tokens, count_tokens)):
+                unit = (" " if kind == "text" and n else "\n\n", piece, kind)
+                if units and count_tokens(_render(units + [unit])) > self.max_tokens:
+                    emit()
+                    units = self._overlap(units) if kind == "text" else []
+                    if units and count_tokens(_render(units + [unit])) > self.max_tokens:
+                        units = []
+                units = units + [unit]
+
+        emit()
+        return chunks
+
+    def _overlap(self, units) -> list:
+        # Trailing prose sentences of the previous chunk, within the budget
+        carried = []
+        for unit in reversed(units):
+            if unit[2] != "text" or self.token_counter.count(_render([unit] + carried)) > self.overlap_tokens:
+                break
+            carried.insert(0, unit)
+        return carried
+
+
+# ----------------------------
+# Overlap spans
+# ----------------------------
+
+def overlap_length(previous: str, chunk: str) -> int:
+    """
+    Length of the longest suffix of `previous` that is a prefix of `chunk`.
+    Carried overlap is whole sentences, so only spans that start and end on
+    a word boundary count; a chance match of a few characters doesn't.
+    """
+    if not previous or not chunk:
+        return 0
+
+    # Leftmost match first: that is the longest suffix
+    start = previous.find(chunk[0], max(len(previous) - len(chunk), 0))
+    while start != -1:
+        tail = previous[start:]
+        if (
+            chunk.startswith(tail)
+            and (start == 0 or previous[start - 1].isspace())
+            and (len(tail) == len(chunk) or chunk[len(tail)].isspace())
+        ):
+            return len(tail)
+        start = previous.find(chunk[0], start + 1)
+    return 0
+
+    head = chunk[:min(probe, len(chunk))]
+    start = previous.find(head)
+    while start != -1:
+        tail = previous[start:]
+        if chunk.startswith(tail):
+            return len(tail)
+        start = previous.find(head, start + 1)
+    return 0
@@ -0,0 +1,208 @@
+"""
+Job Queue
+
+In-process priority queue for background indexing, used by the Project-1
+and Project-3 backends. Each backend creates its own `job_queue` (see the
+backends' jobs modules).
+"""
+
+import itertools
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+# Lower value runs first
+PRIORITIES = {"high": 0, "normal": 5, "low": 10}
+
+# Finished jobs kept for status queries; older ones are forgotten
+MAX_FINISHED_JOBS = 200
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, queue_, name: str, priority: int, on_cancel=None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.priority = priority
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = None
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._queue = queue_
+        self._on_cancel = on_cancel
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def checkpoint(self, progress: float | None = None, message: str | None = None):
+        """
+        Called by the job between units of work: records progress, aborts if
+        the job was cancelled, and yields to in-flight interactive requests.
+        """
+        if progress is not None:
+            self.progress = round(min(max(progress, 0.0), 1.0), 4)
+        if message is not None:
+            self.message = message
+
+        if self.cancelled:
+            raise JobCancelled()
+        self._queue.wait_for_interactive()
+        if self.cancelled:
+            raise JobCancelled()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobQueue:
+    """
+    In-process priority job queue with a small worker pool.
+
+    Jobs are callables `fn(job, *args)` that call `job.checkpoint(...)`
+    regularly. A job cancelled before it starts never runs `fn`; its
+    `on_cancel()` hook, if given, runs instead so resources handed to the
+    job (e.g. a temp upload) are released. While any request is inside `interactive()`, checkpoints
+    pause (up to `max_pause` seconds at a time) so chat traffic gets the
+    CPU and model ahead of bulk indexing.
+    """
+
+    def __init__(self, workers: int = 2, max_pause: float = 5.0):
+        self.workers = workers
+        self.max_pause = max_pause
+        self._queue = queue.PriorityQueue()
+        self._jobs = {}
+        self._finished = []
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self._threads = []
+        self._interactive = 0
+        self._idle = threading.Condition()
+
+    # ----------------------------
+    # Submission and control
+    # ----------------------------
+
+    def submit(
+        self,
+        fn,
+        *args,
+        name: str = "job",
+        priority: str = "normal",
+        on_cancel=None
+    ) -> Job:
+        job = Job(self, name, PRIORITIES[priority], on_cancel)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._start_workers()
+
+        self._queue.put((job.priority, next(self._order), job, fn, args))
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Job | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ("queued", "running"):
+                return job
+            job._cancelled.set()
+            was_queued = job.status == "queued"
+
+        # Running jobs stop at their next checkpoint
+        if was_queued:
+            self._finish(job, "cancelled")
+            if job._on_cancel is not None:
+                job._on_cancel()
+        return job
+
+    # ----------------------------
+    # Interactive preemption
+    # ----------------------------
+
+    @contextmanager
+    def interactive(self):
+        with self._idle:
+            self._interactive += 1
+        try:
+            yield
+        finally:
+            with self._idle:
+                self._interactive -= 1
+                if self._interactive == 0:
+                    self._idle.notify_all()
+
+    def wait_for_interactive(self):
+        with self._idle:
+            if self._interactive:
+                self._idle.wait_for(lambda: self._interactive == 0, timeout=self.max_pause)
+
+    # ----------------------------
+    # Workers
+    # ----------------------------
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f"job-worker-{len(self._threads)}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            _, _, job, fn, args = self._queue.get()
+            with self._lock:
+                if job.cancelled:
+                    continue
+                job.status = "running"
+
+            job.started_at = time.time()
+            try:
+                job.result = fn(job, *args)
+                job.progress = 1.0
+                self._finish(job, "done")
+            except JobCancelled:
+                self._finish(job, "cancelled")
+            except Exception as e:
+                job.error = str(e)
+                self._finish(job, "failed")
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+
+        with self._lock:
+            self._finished.append(job.id)
+            while len(self._finished) > MAX_FINISHED_JOBS:
+                self._jobs.pop(self._finished.pop(0), None)
@@ -0,0 +1,140 @@
+"""
+LLM Client Pool
+
+Shared, lazily created chat model clients. Each distinct configuration is
+built once and reused, so every request after the first skips client
+construction and rides the same keep-alive HTTP session.
+
+Each backend builds its own `pool` from its settings (see the backends'
+llm_client modules).
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+
+DEFAULT_REPO_ID = "mistralai/Mistral-7B-Instruct-v0.2"
+
+
+class LLMPool:
+    """
+    Process-wide pool of chat model clients.
+
+    - Clients are created on first use and cached per configuration
+    - A bounded semaphore caps concurrent calls to the backend
+    - backend="stub" swaps in a canned local model for tests/offline runs
+    """
+
+    def __init__(
+        self,
+        backend: str = "huggingface",
+        repo_id: str = DEFAULT_REPO_ID,
+        api_token: Optional[str] = None,
+        max_concurrency: int = 4,
+        timeout: float = 60,
+        queue_timeout: float = 30,
+        stub_response: str = "This is a stub response."
+    ):
+        self.backend = backend
+        self.repo_id = repo_id
+        self.api_token = api_token
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.stub_response = stub_response
+        self._clients: Dict[tuple, BaseChatModel] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def get(self, **params: Any) -> BaseChatModel:
+        """
+        Get (or lazily build) the client for a configuration.
+
+        Args:
+            **params: HuggingFaceEndpoint settings (temperature, max_new_tokens, ...)
+
+        Returns:
+            Shared chat model instance
+        """
+        key = tuple(sorted(params.items()))
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._build(dict(params))
+                self._clients[key] = client
+        return client
+
+    def _build(self, params: Dict[str, Any]) -> BaseChatModel:
+        if self.backend == "stub":
+            return FakeListChatModel(responses=[self.stub_response])
+
+        from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+        if self.api_token:
+            params.setdefault("huggingfacehub_api_token", self.api_token)
+        endpoint = HuggingFaceEndpoint(
+            repo_id=params.pop("repo_id", self.repo_id),
+            timeout=self.timeout,
+            **params
+        )
+        return ChatHuggingFace(llm=endpoint)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one of the concurrency slots for the duration of a call."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise TimeoutError("Timed out waiting for a free LLM slot")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def invoke(
+        self,
+        messages: Any,
+        response_format: Optional[Dict[str, Any]] = None,
+        **params: Any
+    ) -> Any:
+        """
+        Run a single completion on the shared client.
+
+        Args:
+            messages: Prompt string or list of messages
+            response_format: Optional constrained-decoding spec passed to the
+                backend per call (e.g. {"type": "json", "value": <JSON schema>}
+                for grammar-constrained JSON on TGI endpoints)
+            **params: Client configuration (see get)
+
+        Returns:
+            Model response message
+        """
+        llm = self.get(**params)
+        call_kwargs = {"response_format": response_format} if response_format else {}
+        with self.slot():
+            return llm.invoke(messages, **call_kwargs)
+
+    def stream(self, messages: Any, **params: Any) -> Iterator[str]:
+        """
+        Stream a completion token by token on the shared client.
+
+        The concurrency slot is held until the stream is exhausted or closed.
+
+        Args:
+            messages: Prompt string or list of messages
+            **params: Client configuration (see get)
+
+        Yields:
+            Text fragments as the model generates them
+        """
+        llm = self.get(**params)
+        with self.slot():
+            for chunk in llm.stream(messages):
+                if chunk.content:
+                    yield chunk.content